@@ -0,0 +1,239 @@
+import argparse
+import json
+import platform
+import sys
+import time
+from copy import deepcopy
+from math import ceil, sqrt
+from statistics import median
+import numpy
+from main import World, Config, DEFAULT_CONFIG
+from profiler import Profiler
+from raster import Raster, ppm
+from worker import Frame
+
+SEED = 0
+N_SPECIES = 10
+SCALES = {'1k': 1_000, '10k': 10_000, '100k': 100_000}
+DENSITIES = {'sparse': 0.05, 'dense': 0.4}  # fraction of cells initially occupied
+PHASES = {  # the names recorded by a `Profiler`, and the phase each is reported as
+    'survive': 'aging',
+    'act': 'acting',
+    'pathfind': 'pathfinding',
+    'asexual_reproduction': 'reproduction',
+    'scatter_seeds': 'reproduction',
+    'compact': 'compaction',
+    'cluster': 'clustering',
+}
+
+
+def scenario(scale, density):
+    """
+    Return the number of organisms and the `Config` of the world of the scenario with the given `scale` and `density`.
+    """
+    n_organisms = SCALES[scale]
+    side = ceil(sqrt(n_organisms / DENSITIES[density]))
+    return n_organisms, Config(grid_width=side, grid_height=side)
+
+
+def benchmark_world(scale, density, frames):
+    """
+    Return the results of timing `frames` calls to `World.update` of the scenario, and the final world.
+    The mean and median time per frame are reported, where the median is less affected by a few slow frames.
+    Each phase of `update` is timed separately, where `acting` includes `pathfinding` and `reproduction`.
+    """
+    n_organisms, config = scenario(scale, density)
+    start = time.perf_counter()
+    world = World(n_organisms, N_SPECIES, seed=SEED, config=config)
+    setup = time.perf_counter() - start
+
+    profiler = Profiler().attach(world)
+    frame_seconds = []
+    for _ in range(frames):
+        start = time.perf_counter()
+        world.update()
+        frame_seconds.append(time.perf_counter() - start)
+    profiler.detach()
+
+    phases = {}
+    for name, (seconds, calls) in profiler.totals.items():
+        if name in PHASES:
+            phase = phases.setdefault(PHASES[name], {'seconds': 0.0, 'calls': 0})
+            phase['seconds'] += seconds
+            phase['calls'] += calls
+    for phase in phases.values():
+        phase['frame_seconds'] = phase['seconds'] / frames
+
+    return {
+        'name': f'world/{scale}-{density}',
+        'organisms': n_organisms,
+        'grid': [config.grid_width, config.grid_height],
+        'frames': frames,
+        'final_organisms': len(world.organisms),
+        'setup_seconds': setup,
+        'frame_seconds': sum(frame_seconds) / frames,
+        'median_frame_seconds': median(frame_seconds),
+        'phases': dict(sorted(phases.items())),
+    }, world
+
+
+def benchmark_species(scale, density, world, repeat=3):
+    """
+    Return the results of timing a full refit of the species of `world` with `Species.fit`,
+    and an incremental update with `Species.step` where every organism is already labelled.
+    Each is timed on a copy of the species, and the fastest of `repeat` runs is reported.
+    """
+    population = world.population
+    n = len(population)
+    genotypes, labels = population.genotype[:n], population.label[:n]
+    fit, step = [], []
+    for _ in range(repeat):
+        species = deepcopy(world.species)
+        start = time.perf_counter()
+        species.fit(genotypes)
+        fit.append(time.perf_counter() - start)
+
+        species = deepcopy(world.species)
+        start = time.perf_counter()
+        species.step(genotypes, labels.copy())
+        step.append(time.perf_counter() - start)
+    return {'name': f'species/{scale}-{density}', 'organisms': n, 'fit_seconds': min(fit), 'step_seconds': min(step)}
+
+
+def benchmark_raster(scale, density, world, repeat=3):
+    """
+    Return the results of timing `Raster.render` of `world` and encoding the image for display,
+    where each cell is a single pixel, and the fastest of `repeat` runs is reported.
+    """
+    raster, seconds = Raster(world, 1), []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        ppm(raster.render())
+        seconds.append(time.perf_counter() - start)
+    return {'name': f'raster/{scale}-{density}', 'organisms': len(world.organisms), 'frame_seconds': min(seconds)}
+
+
+def benchmark_render(frames):
+    """
+    Return the results of timing `Simulation.render` of the default world,
+    or a result with the reason it was skipped if the GUI cannot be started.
+    """
+    try:
+        import tkinter as tk
+        from gui import Simulation
+        root = tk.Tk()
+    except Exception as exception:  # a missing display raises `TclError`, an unsupported Python raises `SyntaxError`
+        return {'name': 'render', 'skipped': f'{type(exception).__name__}: {exception}'}
+
+    try:
+        terrain = [['Terrain.EARTH'] * DEFAULT_CONFIG.grid_width for _ in range(DEFAULT_CONFIG.grid_height)]
+        simulation = Simulation(tk.Frame(root), root, n_organisms=200, n_species=N_SPECIES, seed=SEED, terrain_array=terrain)
+        simulation.start()
+        simulation.worker.stop()  # the world is updated here instead, so that only drawing is timed
+        seconds = []
+        for _ in range(frames):
+            simulation.world.update()
+            simulation.frame = Frame(simulation.world)
+            start = time.perf_counter()
+            simulation.render()
+            root.update()
+            seconds.append(time.perf_counter() - start)
+        return {'name': 'render', 'organisms': len(simulation.world.organisms), 'frames': frames, 'frame_seconds': sum(seconds) / frames}
+    finally:
+        root.destroy()
+
+
+def timings(results):
+    """
+    Return a dictionary from a name to each timing in `results`, which are compared between runs.
+    """
+    flat = {}
+    for result in results['benchmarks']:
+        for key in ('frame_seconds', 'median_frame_seconds', 'fit_seconds', 'step_seconds'):
+            if key in result:
+                flat[f'{result["name"]}/{key}'] = result[key]
+        for phase, timing in result.get('phases', {}).items():
+            flat[f'{result["name"]}/{phase}'] = timing['frame_seconds']
+    return flat
+
+
+def regressions(results, baseline, tolerance):
+    """
+    Return a list of the names, baseline timings and timings in `results` that are slower than in `baseline` by more than `tolerance`,
+    as a fraction of the baseline.
+    """
+    current, previous = timings(results), timings(baseline)
+    return [(name, previous[name], seconds) for name, seconds in current.items()
+            if name in previous and seconds > (1 + tolerance) * previous[name]]
+
+
+def failures(slower):
+    """
+    Return the regressions in `slower`, as returned by `regressions`, that fail a comparison.
+    Only the median time per frame of each world is compared strictly, since the other timings are too short to be reliable between runs.
+    """
+    return [regression for regression in slower if regression[0].startswith('world/') and regression[0].endswith('/median_frame_seconds')]
+
+
+def run(scales, densities, frames, render=True, quiet=False):
+    """
+    Run the benchmarks of each scenario and return the results as a JSON-serializable dictionary.
+    The time per frame of each scenario is printed to standard error as it finishes, unless `quiet`.
+    """
+    results = {
+        'python': platform.python_version(),
+        'numpy': numpy.__version__,
+        'platform': platform.platform(),
+        'processor': platform.processor(),
+        'seed': SEED,
+        'benchmarks': [],
+    }
+    for scale in scales:
+        for density in densities:
+            result, world = benchmark_world(scale, density, frames)
+            results['benchmarks'].append(result)
+            results['benchmarks'].append(benchmark_species(scale, density, world))
+            results['benchmarks'].append(benchmark_raster(scale, density, world))
+            if not quiet:
+                print(f'{result["name"]}: {result["frame_seconds"]:.4f} seconds per frame', file=sys.stderr)
+    if render:
+        results['benchmarks'].append(benchmark_render(frames))
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the simulation and write the results as JSON.')
+    parser.add_argument('--scales', nargs='+', choices=SCALES, default=list(SCALES), help='numbers of organisms to benchmark')
+    parser.add_argument('--densities', nargs='+', choices=DENSITIES, default=list(DENSITIES), help='grid densities to benchmark')
+    parser.add_argument('-f', '--frames', type=int, default=10, help='number of frames to time for each scenario')
+    parser.add_argument('--quick', action='store_true', help='only benchmark the smallest scale, such as for CI')
+    parser.add_argument('--no-render', action='store_true', help='skip the rendering benchmark')
+    parser.add_argument('-o', '--output', help='path of a JSON file to write the results to, instead of standard output')
+    parser.add_argument('-i', '--input', help='path of the JSON results of a run to compare, instead of running the benchmarks')
+    parser.add_argument('--compare', help='path of the JSON results of a previous run to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='fraction by which a timing may be slower than the previous run, where only the median time per frame of each world fails the comparison')
+    args = parser.parse_args(argv)
+
+    if args.input:
+        with open(args.input) as f:
+            results = json.load(f)
+    else:
+        scales = ['1k'] if args.quick else args.scales
+        results = run(scales, args.densities, args.frames, not args.no_render)
+        if args.output:
+            with open(args.output, 'w') as f:
+                json.dump(results, f, indent=2)
+        else:
+            print(json.dumps(results, indent=2))
+
+    if args.compare:
+        with open(args.compare) as f:
+            slower = regressions(results, json.load(f), args.tolerance)
+        for name, previous, seconds in slower:
+            print(f'Regression in {name}: {previous:.4f} -> {seconds:.4f} seconds', file=sys.stderr)
+        if failures(slower):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from numpy import array
+import snapshot
+
+NAME = 'frame-{:09d}.world'
+PATTERN = re.compile(r'frame-(\d{9})\.world')
+
+
+def checkpoints(directory):
+    """
+    Return a list of the paths of the checkpoints in `directory`, from the earliest frame to the latest.
+    """
+    if not os.path.isdir(directory):
+        return []
+    names = sorted(name for name in os.listdir(directory) if PATTERN.fullmatch(name))
+    return [os.path.join(directory, name) for name in names]
+
+
+def resume(directory, mmap=False):
+    """
+    Return the `World` in the latest checkpoint in `directory`, or `None` if there are none.
+    """
+    paths = checkpoints(directory)
+    return snapshot.load(paths[-1], mmap) if paths else None
+
+
+class Checkpointer():
+    """
+    Periodically save snapshots of a `World` to `directory` on a background thread.
+
+    Calling a checkpointer with a world after each `World.update` saves a checkpoint every `every` frames.
+    The state of the world is copied on the calling thread, which is cheap compared to encoding and writing it,
+    and then written in the background so the simulation continues in the meantime.
+    At most one write is pending, so if writing falls behind, the next checkpoint waits for the previous one.
+
+    Each checkpoint is written to a temporary file and then renamed, so a checkpoint is either complete or absent.
+    Only the latest `keep` checkpoints are kept, which must be at least `1`.
+    """
+    def __init__(self, directory, every, keep=2, compress=False):
+        if keep < 1:
+            raise ValueError(f'At least one checkpoint must be kept, but keep={keep}.')
+        self.directory = directory
+        self.every = every
+        self.keep = keep
+        self.compress = compress
+        self.executor = ThreadPoolExecutor(1)
+        self.pending = None
+        os.makedirs(directory, exist_ok=True)
+
+    def __call__(self, world):
+        """
+        Save a checkpoint of `world` if its frame is a multiple of `self.every`.
+        """
+        if world.frame % self.every == 0:
+            self.save(world)
+
+    def save(self, world):
+        """
+        Copy the state of `world` and write it to a checkpoint in the background.
+        """
+        header, arrays = snapshot.state(world)
+        arrays = {name: array(value) for name, value in arrays.items()}
+        self.wait()
+        self.pending = self.executor.submit(self.write, NAME.format(world.frame), header, arrays)
+
+    def write(self, name, header, arrays):
+        """
+        Write a checkpoint called `name` and remove all but the latest `self.keep` checkpoints.
+        """
+        path = os.path.join(self.directory, name)
+        snapshot.write(path + '.tmp', header, arrays, self.compress)
+        os.replace(path + '.tmp', path)
+        for path in checkpoints(self.directory)[:-self.keep]:
+            os.remove(path)
+
+    def wait(self):
+        """
+        Wait for the pending write, if any, to finish, raising any exception that it raised.
+        """
+        if self.pending is not None:
+            self.pending.result()
+            self.pending = None
+
+    def close(self):
+        """
+        Wait for the pending write and stop the background thread.
+        """
+        self.wait()
+        self.executor.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
@@ -0,0 +1,154 @@
+from enum import IntEnum
+from numpy import asarray, dtype, int16, int32, int64, load as load_array, uint8, zeros
+from writers import NumPyWriter
+
+BUFFER_SIZE = 65536  # number of events recorded between writes
+
+
+class Event(IntEnum):
+    BIRTH = 0
+    STARVATION = 1
+    AGE = 2
+    PREDATION = 3
+    TRAMPLING = 4
+
+
+def event_dtype(n_traits):
+    """
+    Return the structured dtype of an event about an organism with `n_traits` genes.
+
+    `related_1` and `related_2` are the ids of the parents for a birth, `related_1` is the id of the killer
+    for predation and trampling, and they are `-1` otherwise.
+    """
+    return dtype([
+        ('frame', int64),
+        ('event', uint8),
+        ('id', int64),
+        ('related_1', int64),
+        ('related_2', int64),
+        ('x', int32),
+        ('y', int32),
+        ('genotype', int16, (n_traits,)),
+    ])
+
+
+class EventLog():
+    """
+    An append-only log of births and deaths, written to a `.npy` file of a structured array of `event_dtype`.
+
+    Attach a log to a `World` with `attach`, which also records the organisms already in the world as births without parents.
+    Events are buffered in a preallocated array and written every `buffer_size` events and when closed.
+    Events about many organisms at once are copied from the columns of the `Population` without a Python loop.
+
+    If `frame` is given, such as the frame of a world resumed from a checkpoint, an existing log is continued
+    from the events up to that frame rather than replaced, and any later events in it are removed.
+    """
+    def __init__(self, path, n_traits, buffer_size=BUFFER_SIZE, frame=None):
+        self.writer = NumPyWriter(path, frame)
+        self.continued = self.writer.length > 0  # whether the births of the organisms of the world are already in the log
+        self.buffer = zeros(buffer_size, dtype=event_dtype(n_traits))
+        self.n = 0
+
+    def attach(self, world):
+        """
+        Record the events of `world` from now on, starting with the births of its current organisms
+        unless they are already recorded in the log that this log continues.
+        """
+        world.events = self
+        if not self.continued:
+            population = world.population
+            self.record_many(world.frame, Event.BIRTH, population, range(len(population)))
+
+    def record(self, frame, event, _organism, related_1=None, related_2=None):
+        """
+        Record an `event` about `_organism` and the optional `related_1` and `related_2` organisms.
+        """
+        if self.n == len(self.buffer):
+            self.flush()
+        population, slot = _organism.population, _organism.slot
+        self.buffer[self.n] = (
+            frame, event, population.id[slot],
+            -1 if related_1 is None else related_1.id, -1 if related_2 is None else related_2.id,
+            population.x[slot], population.y[slot], population.genotype[slot]
+        )
+        self.n += 1
+
+    def record_many(self, frame, event, population, slots):
+        """
+        Record an `event` without related organisms about each of the organisms in `slots` of `population`.
+        """
+        slots = asarray(slots, dtype=int64)
+        if self.n + len(slots) > len(self.buffer):
+            self.flush()
+            if len(slots) > len(self.buffer):
+                self.buffer = zeros(len(slots), dtype=self.buffer.dtype)
+        events = self.buffer[self.n:self.n + len(slots)]
+        events['frame'], events['event'] = frame, event
+        events['related_1'] = events['related_2'] = -1
+        for name in ('id', 'x', 'y', 'genotype'):
+            events[name] = getattr(population, name)[slots]
+        self.n += len(slots)
+
+    def flush(self):
+        """
+        Write the buffered events and empty the buffer.
+        """
+        if self.n:
+            self.writer.append(self.buffer[:self.n])
+            self.n = 0
+
+    def close(self):
+        """
+        Write the buffered events and close the file.
+        """
+        self.flush()
+        self.writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def load(path, mmap=True):
+    """
+    Return the structured array of events in the log at `path`, memory-mapped unless `mmap` is `False`.
+    """
+    return load_array(path, mmap_mode='r' if mmap else None)
+
+
+def parents(events):
+    """
+    Return a dictionary from the id of every organism born in `events` to a tuple of the ids of its parents.
+    Organisms without parents, such as those in the initial world, have an empty tuple.
+    """
+    births = events[events['event'] == Event.BIRTH]
+    return {
+        _id: tuple(parent for parent in (related_1, related_2) if parent != -1)
+        for _id, related_1, related_2 in zip(births['id'].tolist(), births['related_1'].tolist(), births['related_2'].tolist())
+    }
+
+
+def children(events):
+    """
+    Return a dictionary from the id of every organism with offspring in `events` to a list of the ids of its children,
+    which is the phylogenetic tree of the organisms in the log.
+    """
+    tree = {}
+    for child, _parents in parents(events).items():
+        for parent in _parents:
+            tree.setdefault(parent, []).append(child)
+    return tree
+
+
+def lineage(events, _id):
+    """
+    Return a list of the ids of the ancestors of the organism `_id` in `events`, following the first parent of each,
+    from its parent back to an organism without parents.
+    """
+    _parents, ancestors = parents(events), []
+    while _parents.get(_id):
+        _id = _parents[_id][0]
+        ancestors.append(_id)
+    return ancestors
@@ -1,11 +1,14 @@
 import copy
 import math
-import pickle
-import random
 import tkinter as tk
 import tkinter.filedialog
 import time
-from main import GRID_HEIGHT, GRID_WIDTH, World, EnergySource
+from numpy import flatnonzero, ones, searchsorted, zeros
+from main import GRID_HEIGHT, GRID_WIDTH, World, EnergySource, ENERGY_SOURCE
+import snapshot
+from profiler import Profiler
+from raster import Raster, ENERGY_LEVELS, energy_bucket, ppm
+from worker import Worker, Frame
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 import matplotlib.pyplot as plt
 
@@ -13,6 +16,10 @@ WIDTH = 800
 HEIGHT = 600
 CELL_SIZE = 400 / GRID_WIDTH
 FPS_REFRESH_RATE = 1 # second
+POLL_INTERVAL = 10 # milliseconds between checks for a new frame from the simulation
+SKIP_MODES = (None, 1, 2, 4, 8, 16) # frames simulated per frame drawn, where `None` adapts to draw at `worker.TARGET_FPS`
+CHART_FPS = 5 # maximum number of times per second that the species chart is redrawn
+RASTER_GRID_SIZE = 100 # grids with more cells than this on a side are drawn as a single image by a `Raster`
 
 EARTH_COLOR = '#556b2f' #dark olive green
 SAND_COLOR = '#e9d66b' #dark aleride yellow
@@ -125,9 +132,8 @@ class App:
     def load(self):
         """Load .world file and launch simulation."""
         file = tkinter.filedialog.askopenfilename()
-        with open(file, 'rb') as f:
-            # FIXME: handle invalid files
-            world = pickle.load(f)
+        # FIXME: handle invalid files
+        world = snapshot.load(file)
         self.simulation = Simulation(self.main_frame, self.root, world=world)
         self.simulation.start()
         self.run_after_delay()
@@ -261,9 +267,8 @@ class App:
 
     def run_after_delay(self):
         if self.simulation.running:
-            start = time.time()
             self.simulation.run()
-            self.root.after(max(int(1000 * (self.simulation.speed + start - time.time())), 1), self.run_after_delay)
+            self.root.after(POLL_INTERVAL, self.run_after_delay)
         else:
             self.simulation.window.pack_forget()
             self.main_menu()
@@ -314,16 +319,28 @@ class Simulation:
         self.n_organisms = n_organisms
         self.n_species = n_species
         self.seed = seed
-        self.tracked_organism = None
+        self.tracked_id = None  # the `id` of the organism whose details are shown at all times
+        self.profiler = None  # the `Profiler` of the world, if profiling is enabled
+        self.raster = None  # the `Raster` that draws the world, if its grid is too large for a canvas item per cell
         self.paused = False
         self.running = True
         self.speed = 1.0
-        self.world = world
+        self.world = world  # updated by `self.worker` on another thread, so it is drawn from `self.frame`
+        self.frame = None  # the `Frame` of the world that is currently drawn
+        self.worker = None
+        self.skip = None  # one of the `SKIP_MODES`
+        self.chart_fps = CHART_FPS
+        self.chart_data = None  # the latest `graph_data` and species colors given to `create_graph_subpane`
+        self.chart_drawn = -math.inf  # the time that the chart was last drawn
+        self.chart_scheduled = False  # whether a throttled redraw of the chart is waiting
+        self.renders = 0  # the number of frames drawn, which is used to measure the rendering rate
+        self.counted = (time.perf_counter(), 0, 0)  # the time, updates and renders when the rates were last shown
         self.initial_world = None
         self.scale_factor = 1.0
         self.original_scale_factor = 1.0
         self.canvas = canvas
         self.terrain_array = terrain_array
+        self.cell_size = CELL_SIZE  # the size of a cell on the canvas, which fits the grid of the world
 
     def start(self):
         """
@@ -336,7 +353,6 @@ class Simulation:
         """
 
         if self.world is None:
-            random.seed(self.seed)
             self.world = World(
                 n_organisms=self.n_organisms,
                 n_species=self.n_species,
@@ -347,7 +363,13 @@ class Simulation:
         else:
             # use seed and terrain from saved simulation
             self.terrain_array = self.world.terrain
-            random.seed(self.world.seed)
+        config = self.world.config
+        if self.terrain_array is None:  # such as a world simulated without the GUI
+            self.terrain_array = [['Terrain.EARTH'] * config.grid_width for _ in range(config.grid_height)]
+        self.cell_size = 400 / max(config.grid_width, config.grid_height)
+        if max(config.grid_width, config.grid_height) > RASTER_GRID_SIZE:
+            self.raster = Raster(self.world, self.raster_cell_size())
+        self.frame = Frame(self.world)
 
         # Set up simulation windows
         self.main_frame.pack_forget()
@@ -361,14 +383,16 @@ class Simulation:
 
         # bottom pane containing the graph
         plt.rcParams.update({'font.size': 10})
-        self.paned_window = tk.PanedWindow(root, orient=tk.HORIZONTAL)
+        self.paned_window = tk.PanedWindow(self.root, orient=tk.HORIZONTAL)
         self.paned_window.pack(fill=tk.BOTH, expand=True)
         self.subpane = tk.PanedWindow(self.paned_window, orient=tk.VERTICAL)
         self.paned_window.add(self.subpane)
-        self.create_graph_subpane(self.world.species.seeds)
+        self.create_graph_subpane(self.frame.living)
 
         # Display and run simulation
         self.render()
+        self.worker = Worker(self.world, self.speed, skip=self.skip)
+        self.worker.start()
 
     def set_up_canvas(self):
         """
@@ -380,30 +404,51 @@ class Simulation:
         self.canvas_original_x = self.canvas.xview()[0]
         self.canvas_original_y = self.canvas.yview()[0]
 
-        self.grid, self.organism_grid = [], []
-        for y in range(GRID_HEIGHT):
+        if self.raster is not None:
+            self.photo = tk.PhotoImage()
+            image = self.canvas.create_image(0, 0, image=self.photo, anchor=tk.NW)
+            self.highlight = self.canvas.create_rectangle(0, 0, 0, 0, outline='yellow', width=3, state=tk.HIDDEN)
+            self.canvas.tag_bind(image, '<Motion>', lambda event: self.view_raster_organism(event))
+            self.canvas.tag_bind(image, '<Button-1>', lambda event: self.view_raster_organism(event, clicked=True))
+            self.canvas.tag_bind(image, '<Leave>', lambda _: self.clear_organism_details())
+            return
+
+        config, cell_size = self.world.config, self.cell_size
+        self.grid = []
+        for y in range(config.grid_height):
             self.grid.append([])
-            self.organism_grid.append([])
-            for x in range(GRID_WIDTH):
-                _x, _y = CELL_SIZE * (x + 1), CELL_SIZE * (y + 1)
+            for x in range(config.grid_width):
+                _x, _y = cell_size * (x + 1), cell_size * (y + 1)
                 rect = self.canvas.create_rectangle(
                     _x,
                     _y,
-                    _x + CELL_SIZE,
-                    _y + CELL_SIZE,
-                    fill='',
+                    _x + cell_size,
+                    _y + cell_size,
+                    fill=self.get_cell_color(x, y),
                     outline='',
                 )
                 self.grid[y].append(rect)
-                self.organism_grid[y].append(None)
-                self.attach_callbacks(x, y)
+
+        # every organism is drawn with the `organism` tag, so these callbacks are attached once rather than to each shape
+        self.canvas.tag_bind('organism', '<Enter>', lambda _: self.view_hovered_organism())
+        self.canvas.tag_bind('organism', '<Button-1>', lambda _: self.view_hovered_organism(clicked=True))
+        self.canvas.tag_bind('organism', '<Leave>', lambda _: self.clear_organism_details())
+        self.organism_grid = zeros((config.grid_height, config.grid_width), dtype=int)  # the canvas item of the organism in each cell, or `0`
+        # the ids, locations, shapes, labels and canvas items of the organisms drawn in the previous frame, sorted by id
+        self.drawn = (zeros(0, dtype=int),) * 6
+        self.item_ids = {}  # from each canvas item of an organism to the `id` of that organism
+        self.label_colors = {}  # from the label of each species drawn to its color, see `label_color`
 
     def create_graph_subpane(self, graph_data):
         """
         creates and updates the bottom graph showing the values of genotypes for each species
+        `graph_data` is a dictionary from the label of each species to its seed
+
+        The axes are drawn once, and each species is a line from a pool of animated lines which are blitted onto the cached axes.
+        The chart is redrawn at most `self.chart_fps` times per second, and a redraw that comes too soon is delayed,
+        so that the latest data is always drawn eventually.
         """
         x_labels = ["Reproduction", "EnergySource", "Skin", "Movement", "Sleep", "Size"]
-        species_index = 0
 
         if not hasattr(self, 'ax'):
             # sets the axes on the first call
@@ -414,32 +459,72 @@ class Simulation:
             self.ax.set_xticklabels(x_labels)
             y_ticks = list(range(0, 51, 10))
             self.ax.set_yticks(y_ticks)
+            # the limits are fixed, since animated lines are not included when the axes are scaled to fit
+            self.ax.set_xlim(-0.25, len(x_labels) - 0.75)
+            self.ax.set_ylim(0, max(self.frame.config.gene_length, y_ticks[-1]) + 1)
+            plt.subplots_adjust(left=0.1, right=0.9, top=0.9, bottom=0.3)
 
             for widget in self.subpane.winfo_children():
                 widget.destroy()
 
-            canvas = FigureCanvasTkAgg(plt.gcf(), master=self.subpane)
-            canvas_widget = canvas.get_tk_widget()
+            self.chart = FigureCanvasTkAgg(plt.gcf(), master=self.subpane)
+            self.chart.mpl_connect('draw_event', self.cache_chart)
+            canvas_widget = self.chart.get_tk_widget()
             canvas_widget.pack(side=tk.TOP)
 
-        # redraw the lines after each frame
-        for line in self.lines:
-            line.remove()
-        self.lines.clear()
-        for _ in graph_data:
-            line, = self.ax.plot([], [], color='red')
+        self.chart_data = (graph_data, self.frame.labels_colors)
+        if self.chart_scheduled:
+            return
+        delay = self.chart_drawn + 1 / self.chart_fps - time.perf_counter()
+        if delay > 0:
+            self.chart_scheduled = True
+            self.root.after(int(1000 * delay) + 1, self.draw_chart)
+        else:
+            self.draw_chart()
+
+    def draw_chart(self):
+        """
+        Draw the latest `self.chart_data`, adding lines to the pool as needed and hiding the unused ones.
+        """
+        self.chart_scheduled = False
+        if not self.running:
+            return
+        self.chart_drawn = time.perf_counter()
+        graph_data, labels_colors = self.chart_data
+        while len(self.lines) < len(graph_data):
+            line, = self.ax.plot([], [], animated=True)
             self.lines.append(line)
-            
-        for species, line in zip(graph_data, self.lines):
+
+        for i, line in enumerate(self.lines):
+            line.set_visible(i < len(graph_data))
+        for (label, species), line in zip(graph_data.items(), self.lines):
             # add data to the lines based on species genotype and color
-            _colors = self.world.species.labels_colors[species_index]
-            species_color = "#%02x%02x%02x" % tuple([int(255 * color) for color in _colors])
+            species_color = "#%02x%02x%02x" % tuple([int(255 * color) for color in labels_colors[label]])
             line.set_data(range(len(species)), species)
             line.set_color(species_color)
-            species_index += 1
 
-        plt.subplots_adjust(left=0.1, right=0.9, top=0.9, bottom=0.3)
-        plt.gcf().canvas.draw()
+        if not hasattr(self, 'chart_background'):
+            self.chart.draw()  # the first full draw caches the background with `cache_chart`
+            return
+        self.chart.restore_region(self.chart_background)
+        self.draw_lines()
+        self.chart.blit(self.ax.bbox)
+
+    def cache_chart(self, _):
+        """
+        Cache the axes without the lines after the figure is fully drawn, such as when it is first shown or resized,
+        and draw the lines over them.
+        """
+        self.chart_background = self.chart.copy_from_bbox(self.ax.bbox)
+        self.draw_lines()
+
+    def draw_lines(self):
+        """
+        Draw the visible lines of the chart.
+        """
+        for line in self.lines:
+            if line.get_visible():
+                self.ax.draw_artist(line)
 
     def set_up_left_panel(self):
         """
@@ -466,6 +551,15 @@ class Simulation:
         )
         self.pause_button.pack()
 
+        self.profile_button = tk.Button(
+            left_frame,
+            text='Profile',
+            command=self.toggle_profiler,
+            width=30,
+            height=2
+        )
+        self.profile_button.pack()
+
         self.menu_button = tk.Button(
             left_frame,
             text='Main Menu',
@@ -534,12 +628,37 @@ class Simulation:
         reset_button.pack(side=tk.LEFT)
         speed_button_row.pack()
 
+        skip_button_row = tk.Frame(left_frame, width=5, height=2)
+        tk.Label(skip_button_row, text='Frames per draw:').pack(side=tk.LEFT)
+        self.skip_button = tk.Button(
+            skip_button_row,
+            text='Auto',
+            command=self.next_skip,
+            width=5,
+            height=2
+        )
+        self.skip_button.pack(side=tk.LEFT)
+        skip_button_row.pack()
+
+        self.rates_label = tk.Label(
+            left_frame,
+            justify=tk.LEFT
+        )
+        self.rates_label.pack(side=tk.BOTTOM)
+
         self.current_frame_label = tk.Label(
             left_frame,
             justify=tk.LEFT
         )
         self.current_frame_label.pack(side=tk.BOTTOM)
 
+        self.profile_label = tk.Label(
+            left_frame,
+            justify=tk.LEFT,
+            wraplength=220
+        )
+        self.profile_label.pack(side=tk.BOTTOM)
+
         self.organism_info_area = tk.Label(
             left_frame,
             justify=tk.LEFT,
@@ -550,10 +669,23 @@ class Simulation:
         self.organism_info_area.pack()
         return window
 
+    def raster_cell_size(self):
+        """
+        Return the number of pixels on a side of a cell that fits the grid of the world in the canvas.
+        """
+        config = self.world.config
+        return max(1, 400 // max(config.grid_width, config.grid_height))
+
     def zoom_canvas(self, factor):
         """
         Scale the canvas view by the given `factor`
         """
+        if self.raster is not None:
+            # an image can only be drawn with a whole number of pixels per cell
+            cell_size = self.raster.cell_size
+            self.raster = Raster(self.world, max(1, math.ceil(cell_size * factor) if factor > 1 else math.floor(cell_size * factor)))
+            self.render()
+            return
         self.canvas.scale(tk.ALL, 0, 0, factor, factor)
         self.original_scale_factor *= 1.0 / factor
         self.scale_factor = 1.0 / self.original_scale_factor
@@ -562,6 +694,12 @@ class Simulation:
         """
         Reset self.canvas Zoom and position.
         """
+        if self.raster is not None:
+            self.raster = Raster(self.world, self.raster_cell_size())
+            self.render()
+            self.canvas.xview_moveto(self.canvas_original_x)
+            self.canvas.yview_moveto(self.canvas_original_y)
+            return
         self.canvas.scale(tk.ALL, 0, 0, self.original_scale_factor, self.original_scale_factor)
         self.original_scale_factor = 1.0
         self.scale_factor = 1.0
@@ -570,47 +708,94 @@ class Simulation:
 
     def run(self):
         """
-        When the `update` button is clicked, simulate the next frame in the simulation.
+        Draw the newest frame simulated by `self.worker` since the last call, if there is one, skipping any older frames.
         When the simulation changes between day and night, change the color of the GUI to reflect that.
         """
-        if not self.paused:
-            self.world.update()
-            if self.tracked_organism:
-                self.organism_info_area.configure(text=str(self.tracked_organism))
-            self.create_graph_subpane(self.world.species.seeds)
-            days = self.world.sun.day_night_cycles // (2 * self.world.sun.day_length)
-            generation = max(organism.generation for organism in self.world.organisms)
-            s = f'Frames: {self.world.frame}, Days: {days}, Time: {'Day' if self.world.sun.is_day else 'Night'}, Generation: {generation}'
-            self.current_frame_label.config(text=s)
-            self.render()
+        frame = self.worker.latest()
+        if frame is None:
+            return
+        self.frame = frame
+        tracked = self.tracked_organism()
+        if tracked:
+            self.organism_info_area.configure(text=str(tracked))
+        elif self.tracked_id is not None:  # the tracked organism died
+            self.tracked_id = None
+            self.organism_info_area.configure(text='')
+        self.create_graph_subpane(frame.living)
+        s = f'Frames: {frame.frame}, Days: {frame.days}, Time: {'Day' if frame.is_day else 'Night'}, Generation: {frame.generation}'
+        self.current_frame_label.config(text=s)
+        if frame.profile is not None:
+            self.profile_label.config(text=frame.profile)
+        self.render()
+        self.renders += 1
+
+    def show_rates(self):
+        """
+        Show the number of frames simulated and drawn per second since the rates were last shown.
+        """
+        now, updates, renders = time.perf_counter(), self.worker.updates, self.renders
+        _now, _updates, _renders = self.counted
+        elapsed = now - _now
+        self.rates_label.config(text=f'Simulated: {(updates - _updates) / elapsed:.1f} frames/s, Drawn: {(renders - _renders) / elapsed:.1f} frames/s')
+        self.counted = (now, updates, renders)
 
     def save(self):
         """Save simulation as a .world file."""
         fname = tkinter.filedialog.asksaveasfilename(defaultextension='.world')
-        with open(fname, 'wb') as f:
-            pickle.dump(self.initial_world, f)
+        snapshot.save(fname, self.initial_world, compress=True)
 
     def faster(self):
         """Double simulation speed."""
         self.speed *= 0.5
+        self.worker.delay = self.speed
 
     def slower(self):
         """Halve simulation speed."""
         self.speed *= 2
+        self.worker.delay = self.speed
 
     def reset_speed(self):
         """Set simulation speed back to default."""
         self.speed = 1.0
+        self.worker.delay = self.speed
+
+    def next_skip(self):
+        """
+        Cycle through the `SKIP_MODES`, the number of frames simulated for each frame drawn.
+        Faster speeds simulate more frames per second, and skipping lets the simulation run faster than frames can be drawn.
+        """
+        self.skip = SKIP_MODES[(SKIP_MODES.index(self.skip) + 1) % len(SKIP_MODES)]
+        self.worker.skip = self.skip
+        self.skip_button.config(text='Auto' if self.skip is None else str(self.skip))
 
     def toggle_pause(self):
         """Pause/resume simulation."""
         self.paused = not self.paused
+        self.worker.paused = self.paused
         if self.paused:
             self.pause_button.config(text='Resume')
         else:
             self.pause_button.config(text='Pause')
 
+    def toggle_profiler(self):
+        """Start/stop profiling the phases of each frame, shown below the frame counter."""
+        if self.profiler is None:
+            self.profiler = Profiler()
+            self.worker.call(self.profiler.attach)
+            self.worker.profiler = self.profiler
+            self.profile_button.config(text='Stop Profiling')
+        else:
+            self.worker.profiler = None
+            self.worker.call(lambda _, profiler=self.profiler: profiler.detach())
+            self.profiler = None
+            self.profile_button.config(text='Profile')
+            self.profile_label.config(text='')
+
     def main_menu(self):
+        self.worker.stop()
+        if self.profiler is not None and self.profiler.world is not None:
+            self.profiler.detach()
+        self.profiler = None
         self.running = False
 
     def color_cell(self, grid, x, y, color):
@@ -623,76 +808,142 @@ class Simulation:
         """
         Give cell a cell at `x` and `y` a yellow outline.
         """
+        if self.raster is not None:
+            cell_size = self.raster.cell_size
+            self.canvas.coords(self.highlight, x * cell_size, y * cell_size, (x + 1) * cell_size, (y + 1) * cell_size)
+            self.canvas.itemconfigure(self.highlight, state=tk.NORMAL)
+            return
         self.canvas.itemconfigure(self.organism_grid[y][x], outline='yellow', width=3)
         self.canvas.tag_raise(self.organism_grid[y][x])
 
-    def shape_cell(self, x, y, energy_source, energy_level):
+    def shape_cell(self, x, y, energy_source, energy_bucket):
         """
-        Set the cell's shape at x and y based on the energy_source.
+        Create and return a shape for an organism at x and y based on the energy_source,
+        sized by its `energy_bucket` from `0` to `ENERGY_LEVELS`.
 
         Photosynthesizers: circle
         Herbivore: triangle
         Carnivore: rectangle
         Omnivore: hexagon
         """
-        _x, _y = CELL_SIZE * (x + 1), CELL_SIZE * (y + 1)
+        cell_size = self.cell_size
+        _x, _y = cell_size * (x + 1), cell_size * (y + 1)
         match energy_source:
             case EnergySource.PHOTOSYNTHESIS:
-                cell = self.canvas.create_oval(_x, _y, _x+CELL_SIZE, _y+CELL_SIZE)
+                cell = self.canvas.create_oval(_x, _y, _x+cell_size, _y+cell_size, tags='organism')
             case EnergySource.HERBIVORE:
                 # triangle
-                cell = self.canvas.create_polygon(_x, _y, _x+CELL_SIZE, _y, _x+(CELL_SIZE/2), _y+CELL_SIZE)
+                cell = self.canvas.create_polygon(_x, _y, _x+cell_size, _y, _x+(cell_size/2), _y+cell_size, tags='organism')
             case EnergySource.CARNIVORE:
-                cell = self.canvas.create_rectangle(_x, _y, _x+CELL_SIZE, _y+CELL_SIZE)
+                cell = self.canvas.create_rectangle(_x, _y, _x+cell_size, _y+cell_size, tags='organism')
             case EnergySource.OMNIVORE:
                 # hexagon (used ChatGPT and trial and error -- math is hard)
                 angle = 360 / 6
                 vertices = []
                 for i in range(6):
                     angle_rad = math.radians(angle * i)
-                    vertex_x = _x + CELL_SIZE * 0.577 * math.cos(angle_rad)
-                    vertex_y = _y + CELL_SIZE * 0.577 * math.sin(angle_rad)
-                    vertices.extend([vertex_x + (0.5*CELL_SIZE), vertex_y + (0.5)*CELL_SIZE])
-                cell = self.canvas.create_polygon(vertices)
-        self.canvas.scale(cell, 0, 0, self.scale_factor, self.scale_factor)
-        x1, y1, x2, y2 = self.canvas.bbox(cell)
-        center_x = (x1 + x2) / 2
-        center_y = (y1 + y2) / 2
-        scale_factor = 1.0 if energy_level > 30 else 0.7 + energy_level * 0.01
+                    vertex_x = _x + cell_size * 0.577 * math.cos(angle_rad)
+                    vertex_y = _y + cell_size * 0.577 * math.sin(angle_rad)
+                    vertices.extend([vertex_x + (0.5*cell_size), vertex_y + (0.5)*cell_size])
+                cell = self.canvas.create_polygon(vertices, tags='organism')
+        # scale about the center of the cell, which is where `self.scale_factor` maps it to
+        scale_factor = 0.7 + 0.3 * energy_bucket / ENERGY_LEVELS
+        center_x, center_y = _x + cell_size / 2, _y + cell_size / 2
         self.canvas.scale(cell, center_x, center_y, scale_factor, scale_factor)
-        self.organism_grid[y][x] = cell
-        self.attach_callbacks(x, y)
+        self.canvas.scale(cell, 0, 0, self.scale_factor, self.scale_factor)
+        return cell
 
     def render(self):
         """
-        Changes the color of each cell to display that it's empty of contains an organism.
-        The color of an organism is determined by its `body` trait.
-        If the organism is asleep, its color appear darker.
-        """
-        for x in range(GRID_WIDTH):
-            for y in range(GRID_HEIGHT):
-                color = self.get_cell_color(x, y)
-                self.color_cell(self.grid, x, y, color)
-                organism = self.organism_grid[y][x]
-                if organism:
-                    self.canvas.delete(organism)
-
-        species = self.world.species
-        for organism in self.world.organisms:
-            x, y = organism.get_location()
-            self.shape_cell(x, y, organism.genome.phenotype[EnergySource], organism.energy_level)
-            self.color_cell(self.organism_grid, x, y, "#%02x%02x%02x" % tuple([int(255 * color) for color in species.labels_colors[species.organisms_labels[organism]]]))
-            self.canvas.itemconfigure(self.organism_grid[y][x], outline='black', width=0.01)
-            if organism is self.tracked_organism:
-                self.highlight_organism(x, y)
+        Draw the organisms of `self.frame`, changing only the canvas items of organisms that changed since the last call.
 
-    def attach_callbacks(self, x, y):
-        organism = self.organism_grid[y][x]
-        if organism is not None:
-            # attach callback functions to cell when its clicked or hovered
-            self.canvas.tag_bind(organism, '<Enter>', lambda _, x=x, y=y: self.view_organism_details(x, y))
-            self.canvas.tag_bind(organism, '<Button-1>', lambda _, x=x, y=y: self.view_organism_details(x, y, clicked=True))
-            self.canvas.tag_bind(organism, '<Leave>', lambda _: self.clear_organism_details())
+        Each organism is drawn as one canvas item, which is moved when the organism moves and recoloured when its species changes.
+        An item is only replaced when the organism's shape or size changes, and is deleted when the organism dies.
+        The organisms that changed are found by comparing the arrays of the frame with those of the previous frame, in `self.drawn`,
+        so organisms that did not change cost nothing to draw.
+        The terrain is drawn once, by `set_up_canvas`.
+
+        If the grid is drawn by `self.raster`, the whole frame is instead drawn into a single image.
+        """
+        if self.raster is not None:
+            self.photo.configure(data=ppm(self.raster.render(self.frame.population, self.frame.labels_colors)), format='PPM')
+            self.canvas.configure(scrollregion=(0, 0, self.photo.width(), self.photo.height()))
+            tracked = self.tracked_organism()
+            if tracked:
+                self.highlight_organism(*tracked.get_location())
+            return
+
+        population = self.frame.population
+        n = len(population)
+        ids, xs, ys, labels = population.id[:n], population.x[:n], population.y[:n], population.label[:n]
+        energy_sources, buckets = population.phenotype[:n, ENERGY_SOURCE], energy_bucket(population.energy_level[:n])
+        shapes = energy_sources * (ENERGY_LEVELS + 1) + buckets
+        _ids, _xs, _ys, _shapes, _labels, _items = self.drawn
+
+        # match each organism to the organism drawn in the previous frame with the same id, as both are sorted by id
+        previous = searchsorted(_ids, ids)
+        matched = previous < len(_ids)
+        matched[matched] = _ids[previous[matched]] == ids[matched]
+        previous = previous[matched]
+        died = ones(len(_ids), dtype=bool)
+        died[previous] = False
+        reshaped = _shapes[previous] != shapes[matched]
+        moved = ~reshaped & ((_xs[previous] != xs[matched]) | (_ys[previous] != ys[matched]))
+        recolored = ~reshaped & (_labels[previous] != labels[matched])
+
+        items = zeros(n, dtype=int)
+        items[matched] = _items[previous]
+        for item in (*_items[died].tolist(), *items[matched][reshaped].tolist()):
+            self.canvas.delete(item)
+            del self.item_ids[item]
+
+        step = self.cell_size * self.scale_factor
+        dxs, dys = (xs[matched] - _xs[previous]) * step, (ys[matched] - _ys[previous]) * step
+        for item, dx, dy in zip(items[matched][moved].tolist(), dxs[moved].tolist(), dys[moved].tolist()):
+            self.canvas.move(item, dx, dy)
+        for item, label in zip(items[matched][recolored].tolist(), labels[matched][recolored].tolist()):
+            self.canvas.itemconfigure(item, fill=self.label_color(label))
+
+        created = ~matched
+        created[matched] = reshaped
+        for slot in flatnonzero(created).tolist():
+            item = self.shape_cell(int(xs[slot]), int(ys[slot]), EnergySource(int(energy_sources[slot])), int(buckets[slot]))
+            self.canvas.itemconfigure(item, fill=self.label_color(int(labels[slot])), outline='black', width=0.01)
+            self.item_ids[item] = int(ids[slot])
+            items[slot] = item
+
+        self.drawn = (ids, xs, ys, shapes, labels, items)
+        self.organism_grid.fill(0)
+        self.organism_grid[ys, xs] = items
+
+        tracked = self.tracked_organism()
+        if tracked:
+            self.highlight_organism(*tracked.get_location())
+
+    def label_color(self, label):
+        """
+        Return the color of the species with the given `label` as a hex string, which is only computed the first time it is drawn.
+        """
+        if label not in self.label_colors:
+            self.label_colors[label] = "#%02x%02x%02x" % tuple([int(255 * color) for color in self.frame.labels_colors[label]])
+        return self.label_colors[label]
+
+    def view_raster_organism(self, event, clicked=False):
+        """
+        Show details about the organism in the cell of the image under the mouse, see `view_organism_details`.
+        """
+        cell_size, config = self.raster.cell_size, self.world.config
+        x, y = int(self.canvas.canvasx(event.x) // cell_size), int(self.canvas.canvasy(event.y) // cell_size)
+        if 0 <= x < config.grid_width and 0 <= y < config.grid_height:
+            self.view_organism_details(x, y, clicked)
+
+    def view_hovered_organism(self, clicked=False):
+        """
+        Show details about the organism under the mouse, see `view_organism_details`.
+        """
+        organism = self.frame.organism(self.item_ids[self.canvas.find_withtag('current')[0]])
+        if organism:
+            self.view_organism_details(*organism.get_location(), clicked)
 
     def view_organism_details(self, x, y, clicked=False):
         """
@@ -703,24 +954,26 @@ class Simulation:
         will be shown at all times (except temporarily when hovering over
         another organism)
         """
-        organism = self.world.cell_content(x, y)
+        organism = self.frame.cell_content(x, y)
         if organism:
             self.organism_info_area.configure(text=str(organism))
             if clicked:
+                tracked = organism.id == self.tracked_id
                 self.clear_tracked_organism()
-                if organism is self.tracked_organism:
+                if tracked:
                     self.clear_organism_details()
                     return
                 self.highlight_organism(x, y)
-                self.tracked_organism = organism
+                self.tracked_id = organism.id
 
     def clear_organism_details(self):
         """
         Clear text in `self.organism_info_area`, or show the currently
         tracked organism's info if there is one.
         """
-        if self.tracked_organism:
-            self.organism_info_area.configure(text=str(self.tracked_organism))
+        tracked = self.tracked_organism()
+        if tracked:
+            self.organism_info_area.configure(text=str(tracked))
         else:
             self.organism_info_area.configure(text='')
 
@@ -728,10 +981,19 @@ class Simulation:
         """
         No longer track the currently tracked organism and remove its highlight.
         """
-        if self.tracked_organism:
-            old_loc = self.tracked_organism.get_location()
-            self.canvas.itemconfigure(self.organism_grid[old_loc[1]][old_loc[0]], outline='')
-            self.tracked_organism = None
+        tracked = self.tracked_organism()
+        if self.raster is not None:
+            self.canvas.itemconfigure(self.highlight, state=tk.HIDDEN)
+        elif tracked:
+            old_loc = tracked.get_location()
+            self.canvas.itemconfigure(self.organism_grid[old_loc[1]][old_loc[0]], outline='black', width=0.01)
+        self.tracked_id = None
+
+    def tracked_organism(self):
+        """
+        Return the tracked organism, or `None` if no organism is tracked or it has died.
+        """
+        return None if self.tracked_id is None else self.frame.organism(self.tracked_id)
 
     def get_cell_color(self, x, y):
         """
@@ -752,17 +1014,15 @@ if __name__ == "__main__":
     root = tk.Tk()
     app = App(root)
     
-    start, counter = time.time(), 0
+    start = time.time()
 
     while True:
         root.update_idletasks()
         root.update()
 
-        if False:
-            counter += 1
-            current = time.time()
-            elapsed = current - start
-            if elapsed > FPS_REFRESH_RATE:
-                print("FPS: ", counter / elapsed)
-                counter = 0
-                start = current
+        current = time.time()
+        if current - start > FPS_REFRESH_RATE:
+            simulation = app.simulation
+            if simulation is not None and simulation.running and simulation.worker is not None:
+                simulation.show_rates()
+            start = current
@@ -0,0 +1,126 @@
+import argparse
+import csv
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from numpy import bincount
+from main import World, Config, DEFAULT_CONFIG, EnergySource, ENERGY_SOURCE, TRAITS
+from checkpoint import Checkpointer, resume
+from metrics import Metrics
+from events import EventLog
+from profiler import Profiler
+from raster import Recorder
+
+
+def statistics(world):
+    """
+    Return a dictionary of summary statistics about the current state of `world`.
+    """
+    population = world.population
+    n = len(population)
+    energy_sources = bincount(population.phenotype[:n, ENERGY_SOURCE], minlength=len(EnergySource) + 1)
+    energy_level = population.energy_level[:n]
+    return {
+        'frame': world.frame,
+        'organisms': n,
+        **{energy_source.name.lower(): int(energy_sources[energy_source.value]) for energy_source in EnergySource},
+        'species': int((world.species.counts > 0).sum()),
+        'max_generation': int(population.generation[:n].max(initial=0)),
+        'mean_energy': float(energy_level.mean()) if n else 0.0,
+    }
+
+
+def run(n_organisms, n_species, seed, frames, output=None, config=DEFAULT_CONFIG, background=False, checkpointer=None, world=None, recorder=None):
+    """
+    Simulate a `World` with the given `config` without a GUI until its frame is `frames`, stopping early if every organism dies.
+    Return a list of the `statistics` of each frame, starting with the initial world, and the seconds spent updating.
+
+    If `world` is given, such as one resumed from a checkpoint, it is simulated instead of a new world.
+    If `output` is given, the statistics are written to it as a CSV file.
+    If `background` is `True`, species are clustered on a background thread.
+    If `checkpointer` is given, it is called with the world after every frame.
+    If `recorder` is given, such as a `Recorder`, it is also called with the world after every frame.
+    """
+    if world is None:
+        world = World(n_organisms, n_species, seed=seed, config=config)
+    rows = [statistics(world)]
+
+    with ThreadPoolExecutor(1) as executor:
+        if background:
+            world.species.executor = executor
+        elapsed = 0
+        while world.frame < frames and world.organisms:
+            start = time.perf_counter()
+            world.update()
+            if checkpointer is not None:
+                checkpointer(world)
+            if recorder is not None:
+                recorder(world)
+            elapsed += time.perf_counter() - start
+            rows.append(statistics(world))
+        world.species.executor = None
+
+    if output:
+        with open(output, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=rows[0].keys())
+            writer.writeheader()
+            writer.writerows(rows)
+    return rows, elapsed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Run the simulation without a GUI.')
+    parser.add_argument('-n', '--organisms', type=int, default=200, help='number of organisms in the initial world')
+    parser.add_argument('-s', '--species', type=int, default=10, help='number of species in the initial world')
+    parser.add_argument('--seed', type=int, default=0, help='random seed')
+    parser.add_argument('-f', '--frames', type=int, default=100, help='number of frames to simulate')
+    parser.add_argument('-o', '--output', help='path of a CSV file to write the statistics of each frame to')
+    parser.add_argument('--cluster-every', type=int, help='number of frames between updates of the species, which is that of the checkpoint when resuming')
+    parser.add_argument('--background', action='store_true', help='update the species on a background thread')
+    parser.add_argument('--checkpoints', help='directory to save checkpoints to')
+    parser.add_argument('--checkpoint-every', type=int, default=100, help='number of frames between checkpoints')
+    parser.add_argument('--resume', action='store_true', help='continue from the latest checkpoint, if there is one')
+    parser.add_argument('--metrics', help='path of a .csv, .npy or .parquet file to record the metrics of each frame to')
+    parser.add_argument('--events', help='path of a .npy file to record births and deaths to')
+    parser.add_argument('--images', help='directory to save an image of each frame to')
+    parser.add_argument('--image-every', type=int, default=1, help='number of frames between images')
+    parser.add_argument('--cell-size', type=int, default=4, help='number of pixels on a side of a cell in the images')
+    parser.add_argument('--profile', action='store_true', help='print the time spent in each phase of a frame')
+    args = parser.parse_args(argv)
+
+    config = DEFAULT_CONFIG if args.cluster_every is None else Config(cluster_every=args.cluster_every)
+    world = resume(args.checkpoints) if args.resume and args.checkpoints else None
+    resumed = None if world is None else world.frame  # the metrics and events of a resumed world continue from its frame
+    if world is not None:
+        print(f'Resuming from frame {world.frame}')
+        if args.cluster_every not in (None, world.config.cluster_every):
+            print(f'Ignoring --cluster-every {args.cluster_every}, since the checkpoint clusters every {world.config.cluster_every} frames', file=sys.stderr)
+    if world is None:
+        world = World(args.organisms, args.species, seed=args.seed, config=config)
+    checkpointer = Checkpointer(args.checkpoints, args.checkpoint_every) if args.checkpoints else None
+    world.metrics = Metrics(args.metrics, frame=resumed) if args.metrics else None
+    if args.events:
+        EventLog(args.events, len(TRAITS), frame=resumed).attach(world)
+    recorder = Recorder(args.images, args.image_every, args.cell_size) if args.images else None
+    profiler = Profiler(window=args.frames).attach(world) if args.profile else None
+    try:
+        rows, elapsed = run(args.organisms, args.species, args.seed, args.frames, args.output, config, args.background, checkpointer, world, recorder)
+    finally:
+        if checkpointer is not None:
+            checkpointer.close()
+        if world.metrics is not None:
+            world.metrics.close()
+        if world.events is not None:
+            world.events.close()
+    frames = rows[-1]['frame'] - rows[0]['frame']
+    print(f'Simulated {frames} frames in {elapsed:.2f} seconds ({frames / elapsed if elapsed else 0:.2f} frames per second)')
+    for key, value in rows[-1].items():
+        print(f'  {key + ":":16}{value:.2f}' if isinstance(value, float) else f'  {key + ":":16}{value}')
+    if profiler is not None:
+        print('Milliseconds per frame and calls per frame:')
+        for name, stats in sorted(profiler.stats().items(), key=lambda item: -item[1]['seconds']):
+            print(f'  {name + ":":24}{1000 * stats["seconds"]:9.3f} ms {stats["calls"]:10.1f}')
+
+
+if __name__ == '__main__':
+    main()
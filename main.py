@@ -1,9 +1,16 @@
+import random
 import textwrap
 
-from random import randint, choice, gauss, sample
+from dataclasses import dataclass
 from math import ceil, copysign
+from itertools import product
+from numpy import arange, concatenate, count_nonzero, flatnonzero, int8, int32, lexsort, full, stack, zeros
 from enum import Enum, auto
-from species import Species
+from species import Species, BANDWIDTH, DRIFT_THRESHOLD, UNASSIGNED_THRESHOLD, CLUSTER_EVERY
+from population import Population
+from neighbourhood import reachable, empty, occupied
+from streams import Streams
+from events import Event
 
 GRID_WIDTH = 50
 GRID_HEIGHT = 50
@@ -15,6 +22,36 @@ SIGMA = 1
 MUTATION_RATE = 50  # range from 0 to 100%
 PHOTOSYNTHESIS_RATE = 1.1
 REPRODDUCTION_ENERGY_THRESHOLD = 2
+DAY_LENGTH = 5
+DEATH_CAUSES = ('starvation', 'age', 'predation', 'trampling')
+
+
+@dataclass(frozen=True)
+class Config():
+    """
+    The parameters of a `World`, which default to the module-level constants of the same name.
+
+    A `World` passes its config to its organisms, genomes, sun and species,
+    so worlds with different configs can exist side by side.
+    """
+    grid_width: int = GRID_WIDTH
+    grid_height: int = GRID_HEIGHT
+    starting_energy_rate: float = STARTING_ENERGY_RATE
+    gene_length: int = GENE_LENGTH
+    eat_energy_rate: float = EAT_ENERGY_RATE
+    visible_range: int = VISIBLE_RANGE
+    sigma: float = SIGMA
+    mutation_rate: float = MUTATION_RATE
+    photosynthesis_rate: float = PHOTOSYNTHESIS_RATE
+    reproduction_energy_threshold: float = REPRODDUCTION_ENERGY_THRESHOLD
+    day_length: int = DAY_LENGTH
+    bandwidth: float = BANDWIDTH
+    drift_threshold: float = DRIFT_THRESHOLD
+    unassigned_threshold: float = UNASSIGNED_THRESHOLD
+    cluster_every: int = CLUSTER_EVERY
+
+
+DEFAULT_CONFIG = Config()
 
 
 class Relationships(Enum):
@@ -71,6 +108,37 @@ PREDATOR_PREY_TYPES = {EnergySource[predator]: [EnergySource[x] for x in prey] f
 
 
 TRAITS = [Reproduction, EnergySource, Skin, Movement, Sleep, Size]
+TRAIT_INDEX = {trait: i for i, trait in enumerate(TRAITS)}
+SIZE, ENERGY_SOURCE = TRAIT_INDEX[Size], TRAIT_INDEX[EnergySource]
+CATEGORIES = {trait: (None, *trait) for trait in TRAITS}  # `CATEGORIES[trait][value]` is the member of `trait` with that `value`
+
+
+def relationship(organism_1_type, organism_1_size, organism_2_type, organism_2_size):
+    """
+    Return the relationship that an organism has to an organism of another species,
+    given the `EnergySource` and `Size` phenotypes of each.
+
+    If the first organism is larger than and can eat the second (as determined by `PREDATOR_PREY_TYPES`),
+    then the relationship is `prey`.
+    If the second organism is larger than and can eat the first, then the relationship is `predator`.
+    Otherwise, the relationship is `neutral`.
+    """
+    organism_1_can_eat_organism_2 = organism_2_type in PREDATOR_PREY_TYPES[organism_1_type]
+    organism_2_can_eat_organism_1 = organism_1_type in PREDATOR_PREY_TYPES[organism_2_type]
+
+    if organism_1_can_eat_organism_2 and organism_1_size.value > organism_2_size.value:
+        return Relationships.PREY
+    if organism_2_can_eat_organism_1 and organism_2_size.value > organism_1_size.value:
+        return Relationships.PREDATOR
+    return Relationships.NEUTRAL
+
+
+# `RELATIONSHIP_TABLE[organism_1_type, organism_1_size, organism_2_type, organism_2_size]` is the value of their `relationship`,
+# indexed by the values of each phenotype
+RELATIONSHIP_TABLE = zeros((len(EnergySource) + 1, len(Size) + 1) * 2, dtype=int8)
+for phenotypes in product(EnergySource, Size, EnergySource, Size):
+    RELATIONSHIP_TABLE[tuple(phenotype.value for phenotype in phenotypes)] = relationship(*phenotypes).value
+RELATIONSHIPS = (None, *Relationships)  # `RELATIONSHIPS[value]` is the member of `Relationships` with that `value`
 
 
 def distance(xy, _xy):
@@ -82,48 +150,112 @@ def distance(xy, _xy):
     return abs(xy[0] - xy[0]) + abs(_xy[1] - _xy[1])
 
 
+class Genes():
+    """
+    A dictionary-like view of one organism's row in either the genotype or phenotype matrix of a `Population`.
+
+    Keys are the classes in `TRAITS`.
+    Genotype values are integers and phenotype values are members of the trait's class.
+    """
+    __slots__ = ('organism', 'matrix')
+
+    def __init__(self, organism, matrix):
+        self.organism = organism
+        self.matrix = matrix
+
+    def row(self):
+        organism = self.organism
+        return getattr(organism.population, self.matrix)[organism.slot]
+
+    def __getitem__(self, trait):
+        organism = self.organism
+        value = int(getattr(organism.population, self.matrix)[organism.slot, TRAIT_INDEX[trait]])
+        return CATEGORIES[trait][value] if self.matrix == 'phenotype' else value
+
+    def __setitem__(self, trait, value):
+        self.row()[TRAIT_INDEX[trait]] = value.value if self.matrix == 'phenotype' else value
+
+    def __contains__(self, trait):
+        return trait in TRAIT_INDEX
+
+    def __iter__(self):
+        return iter(TRAITS)
+
+    def __len__(self):
+        return len(TRAITS)
+
+    def keys(self):
+        return list(TRAITS)
+
+    def values(self):
+        return [self[trait] for trait in TRAITS]
+
+    def items(self):
+        return [(trait, self[trait]) for trait in TRAITS]
+
+    def __repr__(self):
+        return repr(dict(self.items()))
+
+
 class Genome:
     """
     This class will belong to a simulated organism.
     The genotype encodes a specific (integer) value for each trait.
     The phenotype maps from the values of the genotype to categorical traits.
+
+    Both are stored in the organism's row of its `Population`, and `self.genotype` and `self.phenotype` are `Genes` views of that row.
+    The gene length is read from the organism's `config`.
     """
+    __slots__ = ('genotype', 'phenotype', 'config')
 
-    def __init__(self, genotype={}, phenotype={}):
+    def __init__(self, organism, genotype={}, phenotype={}, rng=random):
         """
         The `genotype` is a dictionary mapping from traits to an integer.
         The `phenotype` is a dictionary mapping from traits to a category.
 
         Traits given in the `genotype` parameter will be used to determine that trait in the  phenotype.
         Traits given in the `phenotype` but not in the `genotype` will be used to determine that trait in the `genotype`.
-        Traits not in either parameter will generate a random value for its value in the `genotype`,
+        Traits not in either parameter will generate a random value for its value in the `genotype` using `rng`,
         which will determine its value in the `phenotype`.
         """
-        self.genotype, self.phenotype = genotype.copy(), phenotype.copy()
+        self.genotype, self.phenotype = Genes(organism, 'genotype'), Genes(organism, 'phenotype')
+        self.config = organism.config
 
         for trait in TRAITS:
             if trait in genotype:
                 self.genotype[trait] = genotype[trait]
                 self.set_phenotype(trait)
             elif trait in phenotype:
+                self.phenotype[trait] = phenotype[trait]
                 self.set_genotype(trait)
             else:
-                self.genotype[trait] = randint(1, GENE_LENGTH)
+                self.genotype[trait] = rng.randint(1, self.config.gene_length)
                 self.set_phenotype(trait)
 
+    def __setattr__(self, name, value):
+        """
+        Assigning a mapping to `genotype` or `phenotype` copies its values into the organism's row.
+        """
+        if name != 'config' and hasattr(self, name):
+            current = getattr(self, name)
+            for trait in TRAITS:
+                current[trait] = value[trait]
+        else:
+            object.__setattr__(self, name, value)
+
     def set_phenotype(self, trait):
         """
         Determines and sets the `trait` `self.phenotype` according to the trait's value in `self.genotype`.
         """
         self.phenotype[trait] = trait(
-            ceil(len(trait) * self.genotype[trait] / GENE_LENGTH))
+            ceil(len(trait) * self.genotype[trait] / self.config.gene_length))
 
     def set_genotype(self, trait):
         """
         Determines and sets the `trait` `self.genotype` according to the trait's value in `self.phenotype`.
         """
         self.genotype[trait] = ceil(
-            GENE_LENGTH * self.phenotype[trait].value / len(trait))
+            self.config.gene_length * self.phenotype[trait].value / len(trait))
 
     def print_genotype(self):
         print("Genotype: ", self.genotype)
@@ -135,27 +267,75 @@ class Genome:
         return string
 
 
+def column(name, cast):
+    """
+    Return a property that reads and writes the organism's row of the `name` column of its `Population`.
+    """
+    def get(self):
+        return cast(getattr(self.population, name)[self.slot])
+
+    def set(self, value):
+        getattr(self.population, name)[self.slot] = value
+
+    return property(get, set)
+
+
 class Organism():
     """
     A simulated entity that exists within a simulated environment.
 
     The `x` and `y` attributes indicate its position in the environment.
     An organism dies when its `energy_level` is less than or equal to `0`.
-    """
 
-    def __init__(self, x, y, starting_energy_rate, generation, birthday, is_day=True, genotype={}):
+    An organism is a view of row `self.slot` of `self.population`, which holds all of its state.
+    Organisms in a `World` share the world's `Population`, otherwise an organism has a `Population` of its own.
+    The `config` holds the parameters of the organism's world, which is `DEFAULT_CONFIG` outside of a `World`.
+    """
+    __slots__ = ('population', 'slot', 'genome', 'config')
+
+    id = column('id', int)
+    x = column('x', int)
+    y = column('y', int)
+    energy_level = column('energy_level', float)
+    generation = column('generation', int)
+    birth_frame = column('birth_frame', int)
+    alive = column('alive', bool)
+    awake = column('awake', bool)
+    can_reproduce = column('can_reproduce', bool)
+    label = column('label', int)
+
+    def __init__(self, x, y, starting_energy_rate, generation, birthday, is_day=True, genotype={}, population=None,
+                 config=DEFAULT_CONFIG, rng=random):
         """
         Instantiate an organism at the given `x` and `y` coordinates.
+        Missing traits of the `genotype` are drawn from `rng`.
         """
-        self.genome = Genome(genotype=genotype)
+        self.config = config
+        self.population = Population(len(TRAITS), capacity=1) if population is None else population
+        self.slot = self.population.append(self)
+        self.genome = Genome(self, genotype=genotype, rng=rng)
         self.energy_level = starting_energy_rate * self.size()
         self.update_location(x, y)
         self.awake = (self.genome.phenotype[Sleep] == Sleep.DIURNAL) == is_day
         self.alive = True
         self.can_reproduce = False
+        self.label = -1
+        self.id = -1
         self.generation = generation
         self.birth_frame = birthday
 
+    @classmethod
+    def view(cls, population, slot, config=DEFAULT_CONFIG):
+        """
+        Return an organism that is a view of the existing row `slot` of `population`, without writing to it.
+        """
+        self = cls.__new__(cls)
+        self.population, self.slot, self.config = population, slot, config
+        self.genome = genome = Genome.__new__(Genome)
+        for name, value in (('genotype', Genes(self, 'genotype')), ('phenotype', Genes(self, 'phenotype')), ('config', config)):
+            object.__setattr__(genome, name, value)  # bypass `Genome.__setattr__`, which would copy into the row
+        return self
+
     def update_location(self, x, y):
         """
         Move an organism to the given `x` and `y` coordinates.
@@ -168,13 +348,13 @@ class Organism():
         has the photosynthesis phenotype
         """
         if self.genome.phenotype[EnergySource] == EnergySource.PHOTOSYNTHESIS:
-            self.energy_level += PHOTOSYNTHESIS_RATE
+            self.energy_level += self.config.photosynthesis_rate
 
     def size(self):
         """
         Return the value of the organism's size phenotype.
         """
-        return self.genome.phenotype[Size].value
+        return int(self.population.phenotype[self.slot, SIZE])
 
     def metabolize(self):
         """
@@ -186,10 +366,10 @@ class Organism():
 
     def eat(self, other):
         """
-        Increase the `energy_level` of `self` by the energy of the `other` scaled by `EAT_ENERGY_RATE`.
+        Increase the `energy_level` of `self` by the energy of the `other` scaled by the `eat_energy_rate`.
         Update `other.alive` to `False`.
         """
-        self.energy_level += EAT_ENERGY_RATE * other.energy_level
+        self.energy_level += self.config.eat_energy_rate * other.energy_level
         other.alive = False
 
     def get_location(self):
@@ -198,7 +378,7 @@ class Organism():
         """
         return self.x, self.y
 
-    def meet(self, other, organisms_labels):
+    def meet(self, other):
         """
         Return the relationship that `self` has to `other`.
 
@@ -208,32 +388,17 @@ class Organism():
         If `other` has more energy than and can eat `self` (as determined by `PREDATOR_PREY_TYPES`),
         then then the relationship is `predator`.
         Otherwise, the relationship is `friendly`.
+
+        Relationships between organisms of different species are looked up in `RELATIONSHIP_TABLE`.
         """
-        organism_1_type = self.genome.phenotype[EnergySource]
-        organism_2_type = other.genome.phenotype[EnergySource]
-        organism_1_prey_types = PREDATOR_PREY_TYPES[organism_1_type]
-        organism_2_prey_types = PREDATOR_PREY_TYPES[organism_2_type]
-        organism_1_can_eat_organism_2 = organism_2_type in organism_1_prey_types
-        organism_2_can_eat_organism_1 = organism_1_type in organism_2_prey_types
-        organism_1_size = self.size()
-        organism_2_size = other.size()
-
-        relationship = Relationships.NEUTRAL
-        if self in organisms_labels and other in organisms_labels and organisms_labels[self] == organisms_labels[other]:
-            if all(_organism.energy_level > REPRODDUCTION_ENERGY_THRESHOLD * _organism.size() for _organism in (self, other)):
-                relationship = Relationships.CONSPECIFIC
-        elif organism_1_can_eat_organism_2 and not organism_2_can_eat_organism_1:
-            if organism_1_size > organism_2_size:
-                relationship = Relationships.PREY
-        elif organism_2_can_eat_organism_1 and not organism_1_can_eat_organism_2:
-            if organism_2_size > organism_1_size:
-                relationship = Relationships.PREDATOR
-        elif organism_1_can_eat_organism_2 and organism_2_can_eat_organism_1:
-            if organism_1_size > organism_2_size:
-                relationship = Relationships.PREY
-            elif organism_2_size > organism_1_size:
-                relationship = Relationships.PREDATOR
-        return relationship
+        if self.label != -1 and self.label == other.label:
+            threshold = self.config.reproduction_energy_threshold
+            if all(_organism.energy_level > threshold * _organism.size() for _organism in (self, other)):
+                return Relationships.CONSPECIFIC
+            return Relationships.NEUTRAL
+
+        phenotype_1, phenotype_2 = self.population.phenotype[self.slot], other.population.phenotype[other.slot]
+        return RELATIONSHIPS[RELATIONSHIP_TABLE[phenotype_1[ENERGY_SOURCE], phenotype_1[SIZE], phenotype_2[ENERGY_SOURCE], phenotype_2[SIZE]]]
 
     def get_genotype_values(self):
         """
@@ -243,10 +408,10 @@ class Organism():
 
     def __repr__(self) -> str:
         """
-        Return the last four digits of an organism's unique identifier as a string.
+        Return the organism's `id` as a string, which is unique within its `World`.
         This is used to display the organism in the REPL.
         """
-        return str(id(self))[-5:]
+        return str(self.id)
 
     def __str__(self):
         """
@@ -270,7 +435,7 @@ class Sun():
     """
     is_day = True
 
-    def __init__(self, day_length=5):
+    def __init__(self, day_length=DAY_LENGTH):
         """
         Initializes `self.day_length` (default is 5 frames) and a counter to determine when day switches to night.
         """
@@ -293,43 +458,86 @@ class World():
     """
     A simulated environment containing simulated organisms.
 
-    The `organisms` attribute is a list of `Organism`s.
+    The `organisms` attribute is a list of `Organism`s, which are views of the rows of the `population`.
     The `grid` is the environment, where `grid[y][x]` is a list of things in that cell.
+    The `occupancy` is a boolean array where `occupancy[y, x]` is whether `grid[y][x]` is occupied.
+    The `slots` is an array where `slots[y, x]` is the slot in `population` of the organism in `grid[y][x]`, or `-1` if it is empty.
     The `frame` is a counter which increases by `1` every time `update` is called.
+    The `config` holds the parameters of the simulation, which are `DEFAULT_CONFIG` unless given.
+    The `streams` are the random number generators of the world, derived from its `seed`.
+    The `births` and `deaths` are the number of organisms born and the number that died of each of the `DEATH_CAUSES` during the latest frame.
+    If `metrics` is not `None`, its `record` method is called at the end of every frame.
+    If `events` is not `None`, it is an `EventLog` which each birth and death is recorded to.
+    Each organism spawned in the world is given the next integer `id`, starting from `0`, where `next_id` is the next to be assigned.
     """
-    sun = Sun()
     frame = 0
+    metrics = None
+    events = None
 
-    def __init__(self, n_organisms, n_species, terrain=None, seed=0):
+    def __init__(self, n_organisms, n_species, terrain=None, seed=0, config=DEFAULT_CONFIG):
         """
         Instantiate a simulated environment and append each organism to its respective cell.
         """
         self.seed = seed
-        self.grid = [[None for __ in range(GRID_WIDTH)]
-                     for _ in range(GRID_HEIGHT)]
-        self.organisms = []
+        self.births, self.deaths = 0, dict.fromkeys(DEATH_CAUSES, 0)
+        self.next_id = 0
+        self.streams = Streams(seed)
+        self.config = config
+        self.sun = Sun(config.day_length)
+        self.grid = [[None for __ in range(config.grid_width)]
+                     for _ in range(config.grid_height)]
+        self.occupancy = zeros((config.grid_height, config.grid_width), dtype=bool)
+        self.slots = full((config.grid_height, config.grid_width), -1, dtype=int32)
+        self.population = Population(len(TRAITS), capacity=max(2 * n_organisms, 64))
         self.terrain = terrain
 
-        species = [{trait: randint(1, GENE_LENGTH)
+        gene_length = config.gene_length
+        spawning = self.streams.spawning
+        species = [{trait: spawning.randint(1, gene_length)
                     for trait in TRAITS} for _ in range(n_species)]
         for _ in range(n_organisms):
-            genotype = choice(species).copy()
+            genotype = spawning.choice(species).copy()
             for key in genotype:
                 genotype[key] = (
-                    (genotype[key] + round(gauss(sigma=SIGMA))) % GENE_LENGTH) + 1
+                    (genotype[key] + round(spawning.gauss(sigma=config.sigma))) % gene_length) + 1
             while True:
-                x, y = randint(0, GRID_WIDTH - 1), randint(0, GRID_HEIGHT - 1)
+                x, y = spawning.randint(0, config.grid_width - 1), spawning.randint(0, config.grid_height - 1)
                 if not self.grid[y][x]:
-                    self.spawn_organism(x, y, STARTING_ENERGY_RATE, 1, genotype)
+                    self.spawn_organism(x, y, config.starting_energy_rate, 1, genotype)
                     break
 
-        self.species = Species(self.organisms)
+        self.species = Species(self.population, config.drift_threshold, config.unassigned_threshold,
+                               config.cluster_every, bandwidth=config.bandwidth, rng=self.streams.species)
 
-    def spawn_organism(self, x, y, starting_energy_rate, generation, genotype):
+    def spawn_organism(self, x, y, starting_energy_rate, generation, genotype, parent=None, other_parent=None):
+        """
+        Create an organism at `x` and `y` and insert it into its cell.
+        An offspring of `parent` (and `other_parent`, for sexual reproduction) is provisionally given its first parent's species.
+        """
         _organism = Organism(x, y, starting_energy_rate, generation, self.frame,
-                             self.sun.is_day, genotype)
-        self.organisms.append(_organism)
+                             self.sun.is_day, genotype, self.population, self.config, self.streams.spawning)
+        _organism.id = self.next_id
+        self.next_id += 1
         self.insert_to_cell(_organism)
+        self.births += 1
+        if parent is not None:
+            _organism.label = parent.label
+        if self.events is not None:
+            self.events.record(self.frame, Event.BIRTH, _organism, parent, other_parent)
+
+    def organism(self, _id):
+        """
+        Return the living organism with the id `_id`, or `None` if there is none.
+        """
+        slot = int(self.population.find(_id))
+        return None if slot == -1 else self.organisms[slot]
+
+    @property
+    def organisms(self):
+        """
+        The list of `Organism`s in `self.population`, where the `i`th organism occupies slot `i`.
+        """
+        return self.population.organisms
 
     def insert_to_cell(self, _organism):
         """
@@ -337,6 +545,8 @@ class World():
         """
         x, y = _organism.get_location()
         self.grid[y][x] = _organism
+        self.occupancy[y, x] = True
+        self.slots[y, x] = _organism.slot
 
     def remove_from_cell(self, _organism):
         """
@@ -344,6 +554,8 @@ class World():
         """
         x, y = _organism.get_location()
         self.grid[y][x] = None
+        self.occupancy[y, x] = False
+        self.slots[y, x] = -1
 
     def matching_traits(self, organism_1, organism_2, trait, value):
         """
@@ -357,12 +569,19 @@ class World():
                 return True
         return False
 
+    def meet(self, organism_1, organism_2):
+        """
+        Return the `Relationships` of `organism_1` to `organism_2`, see `Organism.meet`.
+        Organisms meet through their world, so that a `Profiler` of the world can time their meetings without affecting other worlds.
+        """
+        return organism_1.meet(organism_2)
+
     def collide(self, organism_1, organism_2):
         """
         Handle the collision of two organisms by them reproducing,
         one eating the other, or nothing.
         """
-        relationship = organism_1.meet(organism_2, self.species.organisms_labels)
+        relationship = self.meet(organism_1, organism_2)
 
         if relationship == Relationships.CONSPECIFIC:
             # both organisms have sexual reproduction and are not photosynthesizer
@@ -375,10 +594,16 @@ class World():
             if self.defense_mechanism(organism_1, organism_2):
                 organism_1.eat(organism_2)
                 self.remove_from_cell(organism_2)
+                self.deaths['predation'] += 1
+                if self.events is not None:
+                    self.events.record(self.frame, Event.PREDATION, organism_2, organism_1)
         elif relationship == Relationships.PREDATOR:  # IS THIS EVER BEING CALLED??????? no, not rn
             if self.defense_mechanism(organism_2, organism_1):
                 organism_2.eat(organism_1)
                 self.remove_from_cell(organism_1)
+                self.deaths['predation'] += 1
+                if self.events is not None:
+                    self.events.record(self.frame, Event.PREDATION, organism_1, organism_2)
 
     def defense_mechanism(self, predator, prey):
         """
@@ -386,35 +611,60 @@ class World():
         QUILLS has 5% chance of surviving
         """
         prey_skin = prey.genome.phenotype[Skin]
+        defense = self.streams.defense
         if prey_skin == Skin.SHELL:
-            if randint(1, 100) < 10:
+            if defense.randint(1, 100) < 10:
                 predator.energy_level /= 1.01
                 return False
         if prey_skin == Skin.QUILLS:
-            if randint(1, 100) < 5:
+            if defense.randint(1, 100) < 5:
                 return False
         return True
 
     def reachable_cells(self, _organism, n):
         """
-        Yield each coordinate pair reachable from `(x, y)` in `n` moves
-        if that pair is within the bounds `(range(0, GRID_WIDTH), range(0, GRID_HEIGHT))`.
+        Return a `(k, 2)` array of each coordinate pair reachable from `(x, y)` in `n` moves
+        if that pair is within the bounds of the grid.
+        """
+        config = self.config
+        return reachable(_organism.x, _organism.y, n, config.grid_width, config.grid_height)
 
-        TODO: write tests
+    def relationships(self, _organism, slots):
         """
-        x, y = _organism.get_location()
+        Return an array of the value of the relationship that `_organism` has to each organism in `slots` of `self.population`.
+        This is equivalent to calling `meet` on each of them.
+        """
+        population = self.population
+        phenotype = population.phenotype
+        own = phenotype[_organism.slot]
+        sizes = phenotype[slots, SIZE]
+        values = RELATIONSHIP_TABLE[own[ENERGY_SOURCE], own[SIZE], phenotype[slots, ENERGY_SOURCE], sizes]
+
+        label = _organism.label
+        if label != -1:
+            conspecific = population.label[slots] == label
+            if conspecific.any():
+                values[conspecific] = Relationships.NEUTRAL.value
+                threshold = self.config.reproduction_energy_threshold
+                if _organism.energy_level > threshold * _organism.size():
+                    conspecific &= population.energy_level[slots] > threshold * sizes
+                    values[conspecific] = Relationships.CONSPECIFIC.value
+        return values
 
-        for _x in range(max(x - n, 0), min(1 + x + n, GRID_WIDTH)):
-            for _y in range(max(y - n + abs(x - _x), 0), min(y + n + 1 - abs(x - _x), GRID_HEIGHT)):
-                yield _x, _y
+    def occupied_cells(self, _organism, n):
+        """
+        Equivalent to `reachable_cells`, but only returns cells that are occupied.
+
+        Cells are found using `self.occupancy`, a boolean array where `occupancy[y, x]` is whether `grid[y][x]` is occupied,
+        so the cost depends on the number of occupied cells rather than the number of reachable cells.
+        """
+        return stack(occupied(self.occupancy, _organism.x, _organism.y, n), axis=1)
 
     def empty_cells(self, _organism, n):
         """
-        Equivalent to `reachable_cells`, but only yields cells that are not occupied.
+        Equivalent to `reachable_cells`, but only returns cells that are not occupied.
         """
-        for x, y in self.reachable_cells(_organism, n):
-            if not self.grid[y][x]:
-                yield x, y
+        return empty(self.occupancy, _organism.x, _organism.y, n)
 
     def sexual_reproduce(self, organism_1, organism_2):
         """
@@ -425,12 +675,11 @@ class World():
         if any(not _organism.can_reproduce or _organism.energy_level < _organism.size() for _organism in (organism_1, organism_2)):
             return
 
-        cells = list(self.empty_cells(organism_1, 1)) + \
-            list(self.empty_cells(organism_2, 1))
-        if not cells:
+        cells = concatenate((self.empty_cells(organism_1, 1), self.empty_cells(organism_2, 1)))
+        if not len(cells):
             return
 
-        x, y = choice(cells)
+        x, y = self.streams.spawning.choice(cells).tolist()
 
         for _organism in (organism_1, organism_2):
             _organism.can_reproduce = False
@@ -440,18 +689,20 @@ class World():
         genotype_1 = organism_1.get_genotype_values()
         genotype_2 = organism_2.get_genotype_values()
         combined_genotype = list(zip(genotype_1, genotype_2))
-        child_genotype = [choice(_) for _ in combined_genotype]
+        mutation = self.streams.mutation
+        child_genotype = [mutation.choice(_) for _ in combined_genotype]
 
         # chance for a mutation to occur
-        if randint(0, 100) < MUTATION_RATE:
-            target_gene = choice(range(len(child_genotype)))
+        config = self.config
+        if mutation.randint(0, 100) < config.mutation_rate:
+            target_gene = mutation.choice(range(len(child_genotype)))
             child_genotype[target_gene] = (
-                (child_genotype[target_gene] + randint(-10, 10)) % MUTATION_RATE) + 1
+                (child_genotype[target_gene] + mutation.randint(-10, 10)) % config.gene_length) + 1
         new_genotype = {trait: value for trait,
                         value in zip(TRAITS, child_genotype)}
         
         generation = max(organism_1.generation, organism_2.generation) + 1
-        self.spawn_organism(x, y, STARTING_ENERGY_RATE, generation, new_genotype)
+        self.spawn_organism(x, y, config.starting_energy_rate, generation, new_genotype, organism_1, organism_2)
 
     def scatter_seeds(self, org):
         """
@@ -459,52 +710,54 @@ class World():
         excludes organisms that reproduce asexually
         """
         stationary = org.genome.phenotype[Movement] == Movement.STATIONARY
+        mutation_rate, gene_length = self.config.mutation_rate, self.config.gene_length
+        mutation = self.streams.mutation
 
         if stationary:  # plant fills all empty cells in range with offpsring
-            cells = list(self.empty_cells(org, 2))
-            if not (cells and org.can_reproduce):
+            cells = self.empty_cells(org, 2)
+            if not (len(cells) and org.can_reproduce):
                 return
 
-            for x, y in cells:
+            for x, y in cells.tolist():
                 child_genotype = org.get_genotype_values()
-                target_gene = choice(range(len(child_genotype)))
+                target_gene = mutation.choice(range(len(child_genotype)))
                 child_genotype[target_gene] = min(max(
-                    (child_genotype[target_gene] + randint(-10, 10)) % MUTATION_RATE, 1), GENE_LENGTH)
+                    (child_genotype[target_gene] + mutation.randint(-10, 10)) % gene_length, 1), gene_length)
                 new_genotype = {trait: value for trait,
                                 value in zip(TRAITS, child_genotype)}
-                self.spawn_organism(x, y, 1, org.generation + 1, new_genotype)
+                self.spawn_organism(x, y, 1, org.generation + 1, new_genotype, org)
                 org.metabolize()
 
         else:  # non-stationary photosynthesizer searches nearby cells for photosynthesizer, reproduces if found
-            cells = list(self.reachable_cells(org, 1))
-            empty_cells = list(self.empty_cells(org, 1))
-            if not (cells and empty_cells and org.can_reproduce):
+            cells = self.reachable_cells(org, 1)
+            empty_cells = self.empty_cells(org, 1)
+            if not (len(cells) and len(empty_cells) and org.can_reproduce):
                 return
             # location of current organisms appears in reachable_cells
-            cells.remove((org.x, org.y))
+            cells = cells[(cells != (org.x, org.y)).any(axis=1)]
 
-            for x, y in cells:
+            for x, y in cells.tolist():
                 org_2 = self.grid[y][x]
                 photosynthesizer = org_2 and org_2.genome.phenotype[EnergySource] == EnergySource.PHOTOSYNTHESIS
-                same_species = org_2 and org.meet(org_2, self.species.organisms_labels) == Relationships.CONSPECIFIC
+                same_species = org_2 and self.meet(org, org_2) == Relationships.CONSPECIFIC
                 if photosynthesizer and same_species:
                     genotype_1 = org.get_genotype_values()
                     genotype_2 = org_2.get_genotype_values()
                     combined_genotype = list(zip(genotype_1, genotype_2))
-                    child_genotype = [choice(_) for _ in combined_genotype]
+                    child_genotype = [mutation.choice(_) for _ in combined_genotype]
 
                     # chance for a mutation to occur
-                    if randint(0, 100) < MUTATION_RATE:
-                        target_gene = choice(range(len(child_genotype)))
+                    if mutation.randint(0, 100) < mutation_rate:
+                        target_gene = mutation.choice(range(len(child_genotype)))
                         child_genotype[target_gene] = (
-                            (child_genotype[target_gene] + randint(-10, 10)) % MUTATION_RATE) + 1
+                            (child_genotype[target_gene] + mutation.randint(-10, 10)) % gene_length) + 1
                     new_genotype = {trait: value for trait,
                                     value in zip(TRAITS, child_genotype)}
 
-                    x, y = choice(empty_cells)
+                    x, y = self.streams.spawning.choice(empty_cells).tolist()
 
                     generation = max(org.generation, org_2.generation) + 1
-                    self.spawn_organism(x, y, 2, generation, new_genotype)
+                    self.spawn_organism(x, y, 2, generation, new_genotype, org, org_2)
                     org.metabolize()
                     break
 
@@ -513,15 +766,16 @@ class World():
         only takes an organsim with asexual reproduction
         searches empty cells and splits the organism evenly among the cells by size and energy_level
         """
-        cells = list(self.empty_cells(org, 1))
-        if not (cells and org.can_reproduce):
+        cells = self.empty_cells(org, 1)
+        if not (len(cells) and org.can_reproduce):
             return
 
         # limited to splitting in up to 3 offspring
         parent_size = org.genome.genotype[Size]
         max_offspring = min(len(cells), 3)
-        cells = sample(cells, max_offspring)
-        new_sizes = (parent_size // max_offspring) % GENE_LENGTH
+        cells = self.streams.spawning.sample(cells.tolist(), max_offspring)
+        gene_length = self.config.gene_length
+        new_sizes = (parent_size // max_offspring) % gene_length
         new_sizes += 1 if new_sizes == 0 else 0
         new_energies = org.energy_level / (max_offspring + 1)
 
@@ -530,13 +784,14 @@ class World():
             if self.grid[y][x] is None:
                 child_genotype = org.get_genotype_values()
                 child_genotype[5] = new_sizes
-                target_gene = choice(range(len(child_genotype) - 1)) # asexual size wont mutate
-                mutation_value = (child_genotype[target_gene] + randint(-20, 20)) % GENE_LENGTH
+                mutation = self.streams.mutation
+                target_gene = mutation.choice(range(len(child_genotype) - 1)) # asexual size wont mutate
+                mutation_value = (child_genotype[target_gene] + mutation.randint(-20, 20)) % gene_length
                 mutation_value += 1 if mutation_value == 0 else 0
                 child_genotype[target_gene] = mutation_value
                 new_genotype = {trait: value for trait,
                                 value in zip(TRAITS, child_genotype)}
-                self.spawn_organism(x, y, new_energies, org.generation + 1, new_genotype)
+                self.spawn_organism(x, y, new_energies, org.generation + 1, new_genotype, org)
                 # temporary, need a better way to split parent energy
                 org.energy_level = new_energies
         # TODO: UPDATE PARENT SIZE AND ENERGY
@@ -554,23 +809,27 @@ class World():
         if cell and not cell.genome.phenotype[EnergySource] == EnergySource.PHOTOSYNTHESIS:
             self.collide(_organism, cell)
         else:
-            if cell:
+            if cell and cell is not _organism:
                 cell.alive = False
                 self.remove_from_cell(cell)
+                self.deaths['trampling'] += 1
+                if self.events is not None:
+                    self.events.record(self.frame, Event.TRAMPLING, cell, _organism)
             self.remove_from_cell(_organism)
             _organism.metabolize()
             _organism.update_location(x, y)
             self.insert_to_cell(_organism)
 
-    def pathfind(self, _organism):
+    def pathfind(self, _organism, wander=None):
         """
-        Search all cells within `VISIBLE_RANGE` for other organisms, choose an action, and then execute the action.
+        Search all cells within the `visible_range` for other organisms, choose an action, and then execute the action.
 
         Actions are determined by the relationship between organisms.
         The organism will move toward a `friendly` or `prey` organism and move away from a `predator` organism.
         The organism will prioritize the response to a `predator`, followed by `prey, and finally `friendly`.
         The organism will prioritize the response to an organism with the same relationship but is closer in `distance`.
-        If no organism is found, the organism will wander `0` or `1` cells.
+        If no organism is found, the organism will wander `0` or `1` cells,
+        choosing the cell with `wander`, a number in `[0, 1)` which is drawn from the `wandering` stream if not given.
 
         TODO: separate relationships and actions
         TODO: write tests
@@ -578,30 +837,32 @@ class World():
         x, y = _organism.get_location()
         _distance = 0
         action = Relationships.NEUTRAL
-        _reachable_cells = self.reachable_cells(_organism, VISIBLE_RANGE)
-
-        for _x, _y in _reachable_cells:
-            cell = self.cell_content(_x, _y)
-            if cell:
-                _action = _organism.meet(cell, self.species.organisms_labels)
-                __distance = distance((x, y), (_x, _y))
-                if action.value < _action.value or (action.value == _action.value and __distance < _distance):
-                    x, y = _x, _y
-                    _distance = __distance
-                    action = _action
+        visible_range = self.config.visible_range
+
+        xs, ys = occupied(self.occupancy, x, y, visible_range)
+        if len(xs):
+            values = self.relationships(_organism, self.slots[ys, xs])
+            distances = distance((x, y), (xs, ys))
+            i = lexsort((distances, -values))[0]
+            if values[i] > action.value:
+                x, y = int(xs[i]), int(ys[i])
+                _distance = distances[i]
+                action = RELATIONSHIPS[values[i]]
 
         if (x, y) == _organism.get_location():
-            wander = list(self.reachable_cells(_organism, 1))
-            if wander:
-                (x, y) = choice(wander)
+            cells = self.reachable_cells(_organism, 1)
+            if len(cells):
+                if wander is None:
+                    wander = self.streams.wandering.random()
+                (x, y) = cells[int(wander * len(cells))].tolist()
 
         if action == Relationships.PREDATOR:
             dx, dy = 0, 0
-            for _x, _y in _reachable_cells:
-                __distance = distance((x, y), (_x, _y))
-                if __distance > _distance:
-                    _distance = __distance
-                    dx, dy = _x - _organism.x, _y - _organism.y
+            cells = self.reachable_cells(_organism, visible_range)
+            distances = distance((x, y), (cells[:, 0], cells[:, 1]))
+            i = distances.argmax()
+            if distances[i] > _distance:
+                dx, dy = (cells[i] - _organism.get_location()).tolist()
         else:
             dx, dy = x - _organism.x, y - _organism.y
 
@@ -617,56 +878,103 @@ class World():
         This method processes and executes one from of the simulation.
 
         The `self.frame` is incremented by `1` every time this method is called.
-        The behavior of each organism in `self.organisms` is determined and enacted sequentially.
 
-        While iterating over the organisms, an organism that dies
-        must have its `alive` attribute set to `False` and be removed from its cell.
-        The organism will be removed from `self.organisms` after the loop is complete,
+        A frame consists of the phases `survive`, `act`, `compact` and `cluster`.
+        Organisms born during a frame are not processed until the next frame.
+
+        An organism that dies must have its `alive` attribute set to `False` and be removed from its cell.
+        The organism will be removed from `self.population` by `compact`,
         so that it does not mutate the collection being iterated over.
         """
         self.frame += 1
+        self.births, self.deaths = 0, dict.fromkeys(DEATH_CAUSES, 0)
+        self.survive()
+        self.act()
+        self.compact()
+        self.cluster()
+        if self.metrics is not None:
+            self.metrics.record(self)
+
+    def survive(self):
+        """
+        Apply the twilight wake toggle, photosynthesis, metabolism, and the starvation and age checks
+        to every living organism at once using the columns of `self.population`.
+        None of these depend on an organism's neighbours, so the order they are applied in does not matter.
+        """
         is_twighlight = self.sun.time_to_twighlight == 1
         self.sun.update()
-        death_dict = {
-            EnergySource.PHOTOSYNTHESIS: randint(30, 65),
-            Reproduction.ASEXUAL: randint(60, 85),
-            Reproduction.SEXUAL: randint(38, 70)
-        }
-
-        for _organism in self.organisms:
-            if _organism.alive:
-                if is_twighlight:
-                    _organism.awake = not _organism.awake
-                if _organism.awake and _organism.genome.phenotype[Movement] is not Movement.STATIONARY:
-                    self.pathfind(_organism)
-                if self.sun.is_day:
-                    _organism.photosynthesize()
-                _organism.metabolize()
-                if _organism.alive and _organism.energy_level <= 0:
-                    _organism.alive = False
-                    self.remove_from_cell(_organism)
-                #organisms die based on age of frames from death_dict
-                for phenotype, age in death_dict.items():
-                    if _organism.genome.phenotype[phenotype.__class__] == phenotype:
-                        if self.frame - _organism.birth_frame > age:
-                            _organism.alive = False
-                            self.remove_from_cell(_organism)
-                if self.frame % 4 == 0:  # added non-sexual reproduction here since self.organisms is being iterated through
-                    if _organism.genome.phenotype[Reproduction] == Reproduction.ASEXUAL:
-                        self.asexual_reproduction(_organism)
-                    elif _organism.genome.phenotype[EnergySource] == EnergySource.PHOTOSYNTHESIS:
-                        self.scatter_seeds(_organism)
-
-        organisms = self.organisms.copy()
-        self.organisms = []
-        for _organism in organisms:
-            if _organism.alive:
-            # if _organism.alive and any(_organism in ls for ls in self.grid):
-                _organism.can_reproduce = True
-                self.organisms.append(_organism)
-
+        lifespans = self.streams.death.integers((30, 60, 38), (66, 86, 71)).tolist()
+        death_dict = dict(zip((EnergySource.PHOTOSYNTHESIS, Reproduction.ASEXUAL, Reproduction.SEXUAL), lifespans))
+
+        population = self.population
+        n = len(population)
+        alive, awake, energy_level = population.alive[:n], population.awake[:n], population.energy_level[:n]
+        phenotype = population.phenotype[:n]
+        photosynthesizing = phenotype[:, ENERGY_SOURCE] == EnergySource.PHOTOSYNTHESIS.value
+
+        if is_twighlight:
+            awake ^= alive
+        if self.sun.is_day:
+            energy_level[alive & photosynthesizing] += self.config.photosynthesis_rate
+        metabolizing = alive & awake
+        energy_level[metabolizing] -= phenotype[metabolizing, SIZE]
+
+        starved = alive & (energy_level <= 0)
+        dead = starved.copy()
+        # organisms die based on age of frames from death_dict
+        age = self.frame - population.birth_frame[:n]
+        for _phenotype, lifespan in death_dict.items():
+            dead |= alive & (phenotype[:, TRAIT_INDEX[_phenotype.__class__]] == _phenotype.value) & (age > lifespan)
+        self.deaths['starvation'] = count_nonzero(starved)
+        self.deaths['age'] = count_nonzero(dead) - self.deaths['starvation']
+        if self.events is not None:
+            self.events.record_many(self.frame, Event.STARVATION, population, flatnonzero(starved))
+            self.events.record_many(self.frame, Event.AGE, population, flatnonzero(dead & ~starved))
+        alive &= ~dead
+        organisms = population.organisms
+        for slot in flatnonzero(dead):
+            self.remove_from_cell(organisms[slot])
+
+    def act(self):
+        """
+        Determine and enact the movement and reproduction of each living organism sequentially, in slot order.
+        """
+        population = self.population
+        n = len(population)
+        alive, awake, phenotype = population.alive[:n], population.awake[:n], population.phenotype[:n]
+        photosynthesizing = phenotype[:, ENERGY_SOURCE] == EnergySource.PHOTOSYNTHESIS.value
+        moving = awake & (phenotype[:, TRAIT_INDEX[Movement]] != Movement.STATIONARY.value)
+        asexual = phenotype[:, TRAIT_INDEX[Reproduction]] == Reproduction.ASEXUAL.value
+        reproducing = self.frame % 4 == 0
+        wander = self.streams.wandering.random(n)
+        organisms = population.organisms
+        for slot in flatnonzero(alive):
+            _organism = organisms[slot]
+            if moving[slot] and _organism.alive:
+                self.pathfind(_organism, wander[slot])
+            if reproducing and _organism.alive:
+                if asexual[slot]:
+                    self.asexual_reproduction(_organism)
+                elif photosynthesizing[slot]:
+                    self.scatter_seeds(_organism)
+
+    def compact(self):
+        """
+        Remove dead organisms from `self.population`, allow the survivors to reproduce again, and rebuild `self.slots`.
+        """
+        population = self.population
+        population.compact()
+        n = len(population)
+        population.can_reproduce[:n] = True
+        self.slots.fill(-1)
+        self.slots[population.y[:n], population.x[:n]] = arange(n)
+
+    def cluster(self):
+        """
+        Update the species of the surviving organisms, if there are any.
+        """
         if self.organisms:
-            self.species.cluster(self.organisms)
+            self.species.cluster(self.population)
 
     def cell_content(self, x, y):
         "Accepts tuple integers x and y where y is the yth list and x is the xth position in the yth list."
@@ -683,14 +991,14 @@ class World():
                 if not cell:
                     grid_str += '[     ]'
                 else:
-                    grid_str += f'[{str(id(cell))[-5:]}]'
+                    grid_str += f'[{cell.id:5}]'
             grid_str += '\n'
         print("Number of organisms", len(self.organisms))
         return grid_str
 
 
 if __name__ == '__main__':
-    world = World()
+    world = World(200, 10)
     stop = False
 
     while True:
@@ -0,0 +1,85 @@
+import os
+from numpy import asarray, bincount, concatenate, flatnonzero, full, int64, nan
+from main import EnergySource, ENERGY_SOURCE, DEATH_CAUSES
+from writers import WRITERS
+
+BUFFER_SIZE = 1024  # number of frames recorded between writes
+FIELDS = ('frame', 'organisms', *(energy_source.name.lower() for energy_source in EnergySource), 'species', 'births',
+          *(f'deaths_{cause}' for cause in DEATH_CAUSES), 'energy_mean', 'energy_std', 'energy_min', 'energy_max', 'max_generation')
+
+
+class Metrics():
+    """
+    Record summary statistics of a `World` at the end of every frame, and write them to files in bulk.
+
+    Set the `metrics` attribute of a world to an instance of this class to record it.
+    Each frame is a row of the frames table at `path`, with the `FIELDS`: the number of organisms in total and with each `EnergySource`,
+    the number of living species, the births and the deaths by each of the `DEATH_CAUSES` during the frame,
+    the distribution of energy levels, and the maximum generation.
+    Each living species in each frame is a row of the species table, with its label and number of organisms,
+    which is written next to `path` with `-species` appended to its name.
+
+    The format is determined by the extension of `path`, which is one of the keys of `WRITERS`.
+    Rows are buffered and written every `buffer_size` frames and when closed.
+    If `frame` is given, such as the frame of a world resumed from a checkpoint, existing files are continued
+    from the rows of that frame rather than replaced, and any later rows in them are removed.
+    """
+    def __init__(self, path, buffer_size=BUFFER_SIZE, frame=None):
+        root, extension = os.path.splitext(path)
+        if extension not in WRITERS:
+            raise ValueError(f'Unsupported metrics format `{extension}`, expected one of {", ".join(WRITERS)}.')
+        writer = WRITERS[extension]
+        self.writers = {'frames': writer(path, frame), 'species': writer(f'{root}-species{extension}', frame)}
+        self.buffer_size = buffer_size
+        self.buffers = {'frames': [], 'species': []}
+
+    def record(self, world):
+        """
+        Buffer the statistics of the current frame of `world`, writing the buffers if they are full.
+        """
+        population = world.population
+        n = len(population)
+        energy_sources = bincount(population.phenotype[:n, ENERGY_SOURCE], minlength=len(EnergySource) + 1)
+        labels = population.label[:n]
+        species_counts = bincount(labels[labels >= 0])
+        living = flatnonzero(species_counts)
+        energy_level = population.energy_level[:n]
+
+        self.buffers['frames'].append((
+            world.frame,
+            n,
+            *energy_sources[[energy_source.value for energy_source in EnergySource]].tolist(),
+            len(living),
+            world.births,
+            *(world.deaths[cause] for cause in DEATH_CAUSES),
+            *((energy_level.mean(), energy_level.std(), energy_level.min(), energy_level.max()) if n else (nan,) * 4),
+            population.generation[:n].max(initial=0),
+        ))
+        self.buffers['species'].append((full(len(living), world.frame), living, species_counts[living]))
+        if len(self.buffers['frames']) >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        """
+        Write the buffered rows and empty the buffers.
+        """
+        if not self.buffers['frames']:
+            return
+        self.writers['frames'].write({name: asarray(column) for name, column in zip(FIELDS, zip(*self.buffers['frames']))})
+        frames, labels, counts = (concatenate(column).astype(int64) for column in zip(*self.buffers['species']))
+        self.writers['species'].write({'frame': frames, 'label': labels, 'count': counts})
+        self.buffers = {'frames': [], 'species': []}
+
+    def close(self):
+        """
+        Write the buffered rows and close the files.
+        """
+        self.flush()
+        for writer in self.writers.values():
+            writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
@@ -0,0 +1,65 @@
+from functools import lru_cache
+from numpy import abs, arange, stack
+
+
+@lru_cache
+def diamond(n):
+    """
+    Return a read-only `(2n + 1, 2n + 1)` boolean mask of the cells within a manhatten distance of `n` from its center.
+    """
+    offsets = abs(arange(-n, n + 1))
+    mask = offsets[:, None] + offsets[None, :] <= n
+    mask.flags.writeable = False
+    return mask
+
+
+@lru_cache(maxsize=None)  # the clipping is at most `n`, so there are at most `(n + 1) ** 4` variants of each radius
+def offsets(n, left=None, right=None, top=None, bottom=None):
+    """
+    Return a read-only `(k, 2)` array of the `(dx, dy)` offsets within a manhatten distance of `n`, sorted by `dx` and then by `dy`.
+
+    The optional `left`, `right`, `top` and `bottom` clip the offsets to `-left <= dx <= right` and `-top <= dy <= bottom`.
+    """
+    dxs, dys = diamond(n).T.nonzero()
+    cells = stack((dxs - n, dys - n), axis=1)
+    if left is not None:
+        dxs, dys = cells[:, 0], cells[:, 1]
+        cells = cells[(-left <= dxs) & (dxs <= right) & (-top <= dys) & (dys <= bottom)]
+    cells.flags.writeable = False
+    return cells
+
+
+def reachable(x, y, n, width, height):
+    """
+    Return a `(k, 2)` array of the `(x, y)` coordinates reachable from `(x, y)` in `n` moves
+    that are within the bounds `(range(0, width), range(0, height))`, sorted by `x` and then by `y`.
+
+    The offsets for each way that the neighbourhood can be clipped by the bounds are computed once and cached.
+    """
+    if n <= x < width - n and n <= y < height - n:
+        return offsets(n) + (x, y)
+    return offsets(n, min(x, n), min(width - 1 - x, n), min(y, n), min(height - 1 - y, n)) + (x, y)
+
+
+def empty(occupancy, x, y, n):
+    """
+    Equivalent to `reachable`, but only returns the cells that are not occupied,
+    where `occupancy[y][x]` is whether a cell is occupied.
+    """
+    height, width = occupancy.shape
+    cells = reachable(x, y, n, width, height)
+    return cells[~occupancy[cells[:, 1], cells[:, 0]]]
+
+
+def occupied(occupancy, x, y, n):
+    """
+    Return arrays of the `x` and `y` coordinates of the occupied cells reachable from `(x, y)` in `n` moves,
+    where `occupancy[y][x]` is whether a cell is occupied.
+
+    The cells are in the same order as `World.reachable_cells`, sorted by `x` and then by `y`.
+    """
+    height, width = occupancy.shape
+    x0, x1, y0, y1 = max(x - n, 0), min(x + n + 1, width), max(y - n, 0), min(y + n + 1, height)
+    window = occupancy[y0:y1, x0:x1] & diamond(n)[y0 - y + n:y1 - y + n, x0 - x + n:x1 - x + n]
+    xs, ys = window.T.nonzero()
+    return xs + x0, ys + y0
@@ -0,0 +1,124 @@
+from numpy import zeros, int8, int16, int32, int64, float64, bool_, flatnonzero, minimum, searchsorted, where
+
+COLUMNS = {
+    'id': int64,
+    'x': int32,
+    'y': int32,
+    'energy_level': float64,
+    'generation': int32,
+    'birth_frame': int64,
+    'alive': bool_,
+    'awake': bool_,
+    'can_reproduce': bool_,
+    'label': int32,
+}
+
+
+class Population():
+    """
+    A columnar (structure-of-arrays) store of organisms.
+
+    Each column in `COLUMNS` is a NumPy array, and `genotype` and `phenotype` are `(capacity, n_traits)` matrices
+    where the phenotype is stored as the `value` of each trait's category.
+    The `i`th organism occupies row `i` (its `slot`) of every column, and `self.organisms[i]` is that organism.
+    Only the first `len(self)` rows are in use, the remaining rows are spare capacity for appending.
+    """
+
+    def __init__(self, n_traits, capacity=64):
+        """
+        Allocate empty columns with room for `capacity` organisms with `n_traits` genes each.
+        """
+        self.n_traits = n_traits
+        self.organisms = []
+        self.allocate(max(capacity, 1))
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        """
+        Return a population whose columns are the values of `arrays`, a dictionary from the name of each column,
+        `genotype` and `phenotype` to an array with one row per organism, which are used without copying.
+        The `organisms` list is empty and must be filled with a view of each row.
+        """
+        population = cls.__new__(cls)
+        population.n_traits = arrays['genotype'].shape[1]
+        population.organisms = []
+        for name in (*COLUMNS, 'genotype', 'phenotype'):
+            setattr(population, name, arrays[name])
+        population.capacity = len(arrays['genotype'])
+        return population
+
+    def allocate(self, capacity):
+        """
+        Resize every column to hold `capacity` rows, keeping the rows currently in use.
+        """
+        n = len(self.organisms)
+        for name, dtype in COLUMNS.items():
+            column = zeros(capacity, dtype=dtype)
+            if n:
+                column[:n] = getattr(self, name)[:n]
+            setattr(self, name, column)
+        for name, dtype in (('genotype', int16), ('phenotype', int8)):
+            matrix = zeros((capacity, self.n_traits), dtype=dtype)
+            if n:
+                matrix[:n] = getattr(self, name)[:n]
+            setattr(self, name, matrix)
+        self.capacity = capacity
+
+    def append(self, organism):
+        """
+        Reserve the next row for `organism` and return its slot.
+        The columns are doubled in size when they are full.
+        """
+        slot = len(self.organisms)
+        if slot == self.capacity:
+            self.allocate(max(2 * self.capacity, 1))
+        self.organisms.append(organism)
+        return slot
+
+    def compact(self):
+        """
+        Remove every organism whose `alive` column is `False`, shifting the remaining rows down in order.
+
+        The surviving organisms have their `slot` updated.
+        Removed organisms are unlabelled and `detach`ed so that any remaining references to them stay readable.
+        """
+        n = len(self.organisms)
+        alive = self.alive[:n]
+        self.label[:n][~alive] = -1
+        for slot in flatnonzero(~alive):
+            self.detach(self.organisms[slot])
+
+        keep = flatnonzero(alive)
+        m = len(keep)
+        for name in (*COLUMNS, 'genotype', 'phenotype'):
+            column = getattr(self, name)
+            column[:m] = column[keep]
+        self.organisms = [self.organisms[slot] for slot in keep]
+        for slot, organism in enumerate(self.organisms):
+            organism.slot = slot
+
+    def find(self, ids):
+        """
+        Return the slot of the organism with each of the `ids`, or `-1` for ids that are not in the population.
+
+        Organisms in a `World` are given increasing ids and rows are only appended, or removed in order by `compact`,
+        so the `id` column is sorted and each id is found with a binary search.
+        """
+        n = len(self.organisms)
+        column = self.id[:n]
+        slots = searchsorted(column, ids)
+        found = (slots < n) & (column[minimum(slots, n - 1)] == ids) if n else False
+        return where(found, slots, -1)
+
+    def detach(self, organism):
+        """
+        Copy the row of `organism` into its own single-row `Population`.
+        """
+        population = Population(self.n_traits, capacity=1)
+        population.organisms.append(organism)
+        for name in (*COLUMNS, 'genotype', 'phenotype'):
+            getattr(population, name)[0] = getattr(self, name)[organism.slot]
+        organism.population, organism.slot = population, 0
+
+    def __len__(self):
+        return len(self.organisms)
@@ -0,0 +1,113 @@
+from collections import defaultdict, deque
+from time import perf_counter
+
+WINDOW = 100  # number of frames that rolling statistics are computed over
+PHASES = ('survive', 'act', 'compact', 'cluster')
+METHODS = ('pathfind', 'asexual_reproduction', 'scatter_seeds', 'sexual_reproduce', 'collide', 'meet', 'empty_cells')
+
+
+class Profiler():
+    """
+    Record the wall time and number of calls of each phase of `World.update` and of the methods called during them.
+
+    Attaching a profiler to a world with `attach` replaces the `PHASES` and `METHODS` of that world, as well as `update`,
+    with timed versions, and `detach` restores them. Only the attributes of that world are replaced, so other worlds,
+    such as those updated on other threads, are unaffected and run exactly the same code as before.
+
+    The `frames` are the time and calls of each name during each of the latest `window` frames,
+    which `stats` summarizes, and the `totals` are those since the profiler was attached.
+    Methods that call each other are timed separately, so `act` includes `pathfind`, which includes `collide`, which includes `meet`.
+    """
+    def __init__(self, window=WINDOW):
+        self.frames = deque(maxlen=window)
+        self.current = defaultdict(lambda: [0.0, 0])
+        self.totals = defaultdict(lambda: [0.0, 0])
+        self.world = None
+
+    def add(self, name, seconds):
+        """
+        Record a call to `name` that took `seconds` during the current frame.
+        """
+        entry = self.current[name]
+        entry[0] += seconds
+        entry[1] += 1
+
+    def wrap(self, method, name):
+        """
+        Return a version of `method` whose calls are recorded as `name`.
+        """
+        def timed(*args, **kwargs):
+            start = perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                self.add(name, perf_counter() - start)
+
+        return timed
+
+    def end_frame(self):
+        """
+        Move the records of the current frame to `self.frames` and add them to `self.totals`.
+        """
+        for name, (seconds, calls) in self.current.items():
+            total = self.totals[name]
+            total[0] += seconds
+            total[1] += calls
+        self.frames.append(dict(self.current))
+        self.current.clear()
+
+    def attach(self, world):
+        """
+        Profile every frame of `world` from now on, and return `self`.
+        Raises a `ValueError` if this profiler or `world` is already being profiled.
+        """
+        if self.world is not None or 'update' in vars(world):
+            raise ValueError('A profiler can only profile one world, and a world can only have one profiler.')
+        self.world = world
+        for name in (*PHASES, *METHODS):
+            setattr(world, name, self.wrap(getattr(world, name), name))
+        update = self.wrap(world.update, 'update')
+
+        def profiled_update():
+            update()
+            self.end_frame()
+
+        world.update = profiled_update
+        return self
+
+    def detach(self):
+        """
+        Stop profiling the world, restoring its methods.
+        """
+        world, self.world = self.world, None
+        for name in ('update', *PHASES, *METHODS):
+            delattr(world, name)
+
+    def stats(self):
+        """
+        Return a dictionary from each name to a dictionary of its mean `seconds` and `calls` per frame
+        and its `max_seconds` in a frame, over the latest frames in `self.frames`.
+        """
+        n = len(self.frames)
+        stats = {}
+        for frame in self.frames:
+            for name, (seconds, calls) in frame.items():
+                entry = stats.setdefault(name, {'seconds': 0.0, 'calls': 0.0, 'max_seconds': 0.0})
+                entry['seconds'] += seconds / n
+                entry['calls'] += calls / n
+                entry['max_seconds'] = max(entry['max_seconds'], seconds)
+        return stats
+
+    def summary(self):
+        """
+        Return a line of the mean milliseconds per frame of `update` and each of the `PHASES`.
+        """
+        stats = self.stats()
+        return ', '.join(f'{name}: {1000 * stats[name]["seconds"]:.1f} ms' for name in ('update', *PHASES) if name in stats)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        if self.world is not None:
+            self.detach()
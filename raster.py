@@ -0,0 +1,154 @@
+import os
+from numpy import abs as absolute, arange, array, clip, flatnonzero, full, sqrt, uint8, unique, zeros
+from main import EnergySource, ENERGY_SOURCE
+
+ENERGY_LEVELS = 10  # number of sizes an organism is drawn at, from smallest up to full size at `FULL_ENERGY`
+FULL_ENERGY = 30
+TERRAIN_COLORS = {
+    'Terrain.EARTH': (0x55, 0x6b, 0x2f),  # dark olive green
+    'Terrain.SAND': (0xe9, 0xd6, 0x6b),  # dark aleride yellow
+    'Terrain.WATER': (0x00, 0x00, 0x8b),  # dark blue
+    'Terrain.ROCK': (0x80, 0x80, 0x80),  # grey
+}
+UNLABELLED_COLOR = (0x80, 0x80, 0x80)
+
+
+def energy_bucket(energy_level):
+    """
+    Return the size from `0` to `ENERGY_LEVELS` that an organism, or an array of organisms, with `energy_level` is drawn at.
+    """
+    return clip(energy_level, 0, FULL_ENERGY).astype(int) * ENERGY_LEVELS // FULL_ENERGY
+
+
+def glyph(energy_source, bucket, cell_size):
+    """
+    Return a `cell_size` by `cell_size` boolean mask of the shape of an organism with the `energy_source` at the size `bucket`.
+
+    Photosynthesizers: circle
+    Herbivore: triangle
+    Carnivore: square
+    Omnivore: hexagon
+    """
+    scale = 0.7 + 0.3 * bucket / ENERGY_LEVELS
+    centers = ((arange(cell_size) + 0.5) / cell_size - 0.5) / scale  # the pixel centres relative to the cell centre, in cells
+    v, u = centers[:, None], centers[None, :]
+    match energy_source:
+        case EnergySource.PHOTOSYNTHESIS:
+            mask = u ** 2 + v ** 2 <= 0.25
+        case EnergySource.HERBIVORE:
+            mask = (v >= -0.5) & (absolute(u) <= (0.5 - v) / 2)
+        case EnergySource.CARNIVORE:
+            mask = (absolute(u) <= 0.5) & (absolute(v) <= 0.5)
+        case EnergySource.OMNIVORE:
+            radius = 0.577
+            mask = (absolute(v) <= radius * sqrt(3) / 2) & (absolute(u) + absolute(v) / sqrt(3) <= radius)
+    mask[cell_size // 2, cell_size // 2] = True  # every organism is visible, even when a cell is a single pixel
+    return mask
+
+
+class Raster():
+    """
+    Draw a `World` into an RGB image, as a NumPy array of shape `(height, width, 3)`, where each cell is `cell_size` pixels square.
+
+    The terrain is drawn once, and each frame is a copy of it with a glyph stamped into the cell of every organism.
+    Organisms with the same glyph are stamped together with NumPy indexing rather than one at a time,
+    so the cost of a frame grows with the number of pixels and organisms, not the number of drawing calls.
+    """
+    def __init__(self, world, cell_size):
+        self.world = world
+        self.cell_size = cell_size
+        self.terrain = self.draw_terrain()
+        self.glyphs = {}  # from the value of an `EnergySource` and a bucket to the pixel offsets of its glyph
+
+    def draw_terrain(self):
+        """
+        Return the image of the terrain of the world, which is earth everywhere if it has no terrain.
+        """
+        config, cell_size = self.world.config, self.cell_size
+        if self.world.terrain is None:
+            cells = full((config.grid_height, config.grid_width, 3), TERRAIN_COLORS['Terrain.EARTH'], dtype=uint8)
+        else:
+            cells = array([[TERRAIN_COLORS[terrain] for terrain in row] for row in self.world.terrain], dtype=uint8)
+        return cells.repeat(cell_size, axis=0).repeat(cell_size, axis=1)
+
+    def offsets(self, energy_source, bucket):
+        """
+        Return the row and column offsets of the pixels of the glyph of `energy_source` at the size `bucket`.
+        """
+        key = (energy_source, bucket)
+        if key not in self.glyphs:
+            rows, columns = glyph(EnergySource(energy_source), bucket, self.cell_size).nonzero()
+            self.glyphs[key] = rows, columns
+        return self.glyphs[key]
+
+    def colors(self, labels_colors):
+        """
+        Return an array of the RGB color of each species label in `labels_colors`, where the last row is the color of unlabelled organisms.
+        """
+        colors = zeros((max(labels_colors, default=-1) + 2, 3), dtype=uint8)
+        for label, color in labels_colors.items():
+            colors[label] = [int(255 * channel) for channel in color]
+        colors[-1] = UNLABELLED_COLOR
+        return colors
+
+    def render(self, population=None, labels_colors=None):
+        """
+        Return the image of the current frame of the world,
+        or of the organisms in `population` coloured by their species in `labels_colors`, such as those of a `Frame` of the world.
+        """
+        image = self.terrain.copy()
+        population = self.world.population if population is None else population
+        labels_colors = self.world.species.labels_colors if labels_colors is None else labels_colors
+        cell_size = self.cell_size
+        n = len(population)
+        if not n:
+            return image
+        top, left = population.y[:n] * cell_size, population.x[:n] * cell_size
+        colors = self.colors(labels_colors)[population.label[:n]]
+        energy_sources = population.phenotype[:n, ENERGY_SOURCE]
+        buckets = energy_bucket(population.energy_level[:n])
+        glyph_ids = energy_sources * (ENERGY_LEVELS + 1) + buckets
+        for glyph_id in unique(glyph_ids).tolist():
+            selected = flatnonzero(glyph_ids == glyph_id)
+            rows, columns = self.offsets(*divmod(glyph_id, ENERGY_LEVELS + 1))
+            image[top[selected, None] + rows, left[selected, None] + columns] = colors[selected, None]
+        return image
+
+
+def ppm(image):
+    """
+    Return `image` encoded as a binary PPM, which a `tkinter.PhotoImage` can display without any other package.
+    """
+    height, width, _ = image.shape
+    return b'P6 %d %d 255 ' % (width, height) + image.tobytes()
+
+
+def save(path, image):
+    """
+    Write `image` to `path` in the format of its extension, such as `.png`, which requires the `pillow` package.
+    """
+    from PIL import Image
+    Image.fromarray(image).save(path)
+
+
+class Recorder():
+    """
+    Save an image of a `World` to `directory` every `every` frames, named by its frame, such as for assembling into a video.
+    Calling a recorder with a world after each `World.update` draws it with a `Raster` and saves it with `save`.
+    """
+    def __init__(self, directory, every=1, cell_size=1, extension='.png'):
+        self.directory = directory
+        self.every = every
+        self.cell_size = cell_size
+        self.extension = extension
+        self.raster = None
+        os.makedirs(directory, exist_ok=True)
+
+    def __call__(self, world):
+        """
+        Save an image of `world` if its frame is a multiple of `self.every`.
+        """
+        if world.frame % self.every == 0:
+            if self.raster is None or self.raster.world is not world:
+                self.raster = Raster(world, self.cell_size)
+            save(os.path.join(self.directory, f'frame-{world.frame:09d}{self.extension}'), self.raster.render())
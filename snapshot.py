@@ -0,0 +1,186 @@
+import json
+import struct
+import zlib
+from dataclasses import asdict
+from numpy import arange, array, asarray, ascontiguousarray, dtype, frombuffer, full, fromfile, int32, memmap, uint32, unique, zeros
+from main import World, Organism, Sun, Config, TRAITS, DEATH_CAUSES
+from population import Population, COLUMNS
+from species import Species
+from streams import Streams, STREAMS, BATCHED_STREAMS
+
+MAGIC = b'ALIFEWLD'
+VERSION = 2  # version 2 added organism ids
+PREAMBLE = struct.Struct('<8sII')  # magic, version, header length
+ALIGNMENT = 64  # every array starts at a multiple of this many bytes, so that it can be memory-mapped
+SPECIES_FIELDS = ('drift_threshold', 'unassigned_threshold', 'every', 'calls', 'born', 'bandwidth', 'initial_bandwidth', 'unassigned')
+
+
+def state(world):
+    """
+    Return a tuple of the JSON-serializable header fields and a dictionary from names to the arrays that describe `world`.
+
+    The grid is not stored, since it is determined by the positions of the organisms.
+    """
+    population, species, sun = world.population, world.species, world.sun
+    n = len(population)
+    arrays = {name: getattr(population, name)[:n] for name in (*COLUMNS, 'genotype', 'phenotype')}
+    labels = sorted(species.labels_colors)
+    arrays.update({
+        'species.seeds': species.seeds,
+        'species.counts': species.counts,
+        'species.centroids': species.centroids,
+        'species.fitted_centroids': species.fitted_centroids,
+        'species.labels': array(labels, dtype=int32),
+        'species.colors': array([species.labels_colors[label] for label in labels], dtype=float).reshape(-1, 3),
+    })
+
+    streams = {}
+    for name in STREAMS:
+        version, internal_state, gauss_next = getattr(world.streams, name).getstate()
+        arrays[f'streams.{name}'] = array(internal_state, dtype=uint32)
+        streams[name] = {'version': version, 'gauss_next': gauss_next}
+    for name in BATCHED_STREAMS:
+        streams[name] = getattr(world.streams, name).bit_generator.state
+
+    terrain = None
+    if world.terrain is not None:
+        categories, indices = unique(asarray(world.terrain, dtype=str), return_inverse=True)
+        arrays['terrain'] = indices.reshape(len(world.terrain), -1).astype(int32)
+        terrain = categories.tolist()
+
+    header = {
+        'frame': int(world.frame),
+        'seed': world.seed,
+        'next_id': world.next_id,
+        'config': asdict(world.config),
+        'sun': {'is_day': bool(sun.is_day), 'day_length': sun.day_length,
+                'time_to_twighlight': sun.time_to_twighlight, 'day_night_cycles': sun.day_night_cycles},
+        'species': {name: getattr(species, name) for name in SPECIES_FIELDS},
+        'streams': streams,
+        'terrain': terrain,
+    }
+    return header, arrays
+
+
+def save(path, world, compress=False):
+    """
+    Write a snapshot of `world` at its current frame to `path`.
+
+    The file starts with `MAGIC`, the format `VERSION` and the length of a JSON header,
+    which holds the scalar state of the world and the dtype, shape, offset and size of each array.
+    The arrays follow the header as raw bytes, each aligned to `ALIGNMENT` bytes.
+    If `compress` is `True`, each array is compressed with zlib, which makes the file smaller but prevents memory-mapping.
+    """
+    write(path, *state(world), compress)
+
+
+def write(path, header, arrays, compress=False):
+    """
+    Write the `header` and `arrays` returned by `state` to `path`, as described in `save`.
+    """
+    header = dict(header)
+    header['compression'] = 'zlib' if compress else None
+    chunks, offset = [], 0
+    header['arrays'] = {}
+    for name, _array in arrays.items():
+        _array = ascontiguousarray(_array)
+        data = _array.tobytes()
+        if compress:
+            data = zlib.compress(data)
+        header['arrays'][name] = {'dtype': _array.dtype.str, 'shape': _array.shape, 'offset': offset, 'nbytes': len(data)}
+        chunks.append(data)
+        offset += -(-len(data) // ALIGNMENT) * ALIGNMENT
+
+    encoded = json.dumps(header, default=lambda value: value.item()).encode()  # NumPy scalars are converted with `item`
+    start = -(-(PREAMBLE.size + len(encoded)) // ALIGNMENT) * ALIGNMENT
+    encoded = encoded.ljust(start - PREAMBLE.size)
+    with open(path, 'wb') as f:
+        f.write(PREAMBLE.pack(MAGIC, VERSION, len(encoded)))
+        f.write(encoded)
+        for data, entry in zip(chunks, header['arrays'].values()):
+            f.seek(start + entry['offset'])
+            f.write(data)
+
+
+def read(path, mmap=False):
+    """
+    Return the header and a dictionary from names to arrays of the snapshot at `path`.
+
+    If `mmap` is `True` and the snapshot is not compressed, the arrays are copy-on-write memory maps of the file,
+    so that only the parts that are used are read, and changes to them are not written back.
+    Raises a `ValueError` if `path` is not a snapshot of a supported version.
+    """
+    with open(path, 'rb') as f:
+        magic, version, length = PREAMBLE.unpack(f.read(PREAMBLE.size))
+        if magic != MAGIC:
+            raise ValueError(f'`{path}` is not a world snapshot.')
+        if version > VERSION:
+            raise ValueError(f'`{path}` is a version {version} snapshot, but only versions up to {VERSION} are supported.')
+        header = json.loads(f.read(length))
+        start = PREAMBLE.size + length
+
+        arrays = {}
+        for name, entry in header['arrays'].items():
+            _dtype, shape = dtype(entry['dtype']), tuple(entry['shape'])
+            if header['compression'] == 'zlib':
+                f.seek(start + entry['offset'])
+                arrays[name] = frombuffer(bytearray(zlib.decompress(f.read(entry['nbytes']))), dtype=_dtype).reshape(shape)
+            elif mmap and entry['nbytes']:
+                arrays[name] = memmap(path, dtype=_dtype, mode='c', offset=start + entry['offset'], shape=shape)
+            else:
+                f.seek(start + entry['offset'])
+                arrays[name] = fromfile(f, dtype=_dtype, count=entry['nbytes'] // _dtype.itemsize).reshape(shape)
+    return header, arrays
+
+
+def load(path, mmap=False):
+    """
+    Return the `World` saved in the snapshot at `path`, which continues exactly as the saved world would have.
+    See `read` for `mmap`.
+    """
+    header, arrays = read(path, mmap)
+    config = Config(**header['config'])
+    world = World.__new__(World)
+    world.seed, world.config, world.frame = header['seed'], config, header['frame']
+    if 'id' not in arrays:
+        arrays['id'] = arange(len(arrays['genotype']))
+    world.next_id = header.get('next_id', len(arrays['genotype']))
+    world.births, world.deaths = 0, dict.fromkeys(DEATH_CAUSES, 0)
+
+    world.streams = streams = Streams(world.seed)
+    for name in STREAMS:
+        entry = header['streams'][name]
+        getattr(streams, name).setstate((entry['version'], tuple(arrays[f'streams.{name}'].tolist()), entry['gauss_next']))
+    for name in BATCHED_STREAMS:
+        getattr(streams, name).bit_generator.state = header['streams'][name]
+
+    world.sun = Sun(header['sun']['day_length'])
+    world.sun.__dict__.update(header['sun'])
+
+    if len(arrays['genotype']):
+        population = Population.from_arrays(arrays)
+    else:
+        population = Population(len(TRAITS))
+    population.organisms = [Organism.view(population, slot, config) for slot in range(len(arrays['genotype']))]
+    world.population = population
+
+    n = len(population)
+    xs, ys = population.x[:n], population.y[:n]
+    world.grid = [[None for __ in range(config.grid_width)] for _ in range(config.grid_height)]
+    for _organism, x, y in zip(population.organisms, xs.tolist(), ys.tolist()):
+        world.grid[y][x] = _organism
+    world.occupancy = zeros((config.grid_height, config.grid_width), dtype=bool)
+    world.occupancy[ys, xs] = True
+    world.slots = full((config.grid_height, config.grid_width), -1, dtype=int32)
+    world.slots[ys, xs] = arange(n)
+
+    terrain = header['terrain']
+    world.terrain = None if terrain is None else [[terrain[i] for i in row] for row in arrays['terrain'].tolist()]
+
+    world.species = species = Species.__new__(Species)
+    species.__dict__.update(header['species'])
+    for name in ('seeds', 'counts', 'centroids', 'fitted_centroids'):
+        setattr(species, name, array(arrays[f'species.{name}']))
+    species.labels_colors = {label: tuple(color) for label, color in zip(arrays['species.labels'].tolist(), arrays['species.colors'].tolist())}
+    species.executor, species.job, species.job_ids, species.rng = None, None, None, streams.species
+    return world
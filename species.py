@@ -1,10 +1,63 @@
 
-from numpy import array
-from sklearn.cluster import MeanShift
-from sklearn.metrics import pairwise_distances_argmin
-from distinctipy import get_colors
+from copy import copy
+from numpy import array, arange, asarray, bincount, count_nonzero, full, ones, vstack, argsort, unravel_index, unique, where
+from numpy.linalg import norm
+from sklearn.metrics import pairwise_distances, pairwise_distances_argmin, pairwise_distances_argmin_min
+from distinctipy import get_colors, WHITE, BLACK
 
 BANDWIDTH = 20
+DRIFT_THRESHOLD = 5  # how far the centroids may move on average before reclustering
+UNASSIGNED_THRESHOLD = 0.05  # fraction of the population born outside of every species before reclustering
+CLUSTER_EVERY = 1  # number of frames between updates of the clusters
+CHUNK_SIZE = 512  # number of seeds shifted at once, which bounds the size of the distance matrices
+
+
+def mean_shift(points, weights, seeds, bandwidth, max_iter=300):
+    """
+    Cluster the `points` using mean shift with a flat kernel, where the `i`th point is counted `weights[i]` times.
+    Return a tuple of the array of cluster centers and the array of the label of each point.
+
+    This is equivalent to `sklearn.cluster.MeanShift(seeds=seeds, bandwidth=bandwidth).fit` on the points repeated by their weights,
+    but its cost depends on the number of distinct points rather than the total weight.
+    Each seed is shifted to the weighted mean of the points within `bandwidth` until it moves less than `1e-3 * bandwidth`.
+    Converged seeds are then sorted by the weight within their bandwidth,
+    and seeds within `bandwidth` of a heavier seed are discarded.
+    Every point is labelled with its nearest remaining center.
+
+    Raises a `ValueError` if no seed has a point within `bandwidth`.
+    """
+    points, weights = asarray(points, dtype=float), asarray(weights, dtype=float)
+    centers = array(seeds, dtype=float)
+    intensities = full(len(centers), 0.0)
+    for start in range(0, len(centers), CHUNK_SIZE):
+        chunk = slice(start, start + CHUNK_SIZE)
+        _centers, _intensities = centers[chunk], intensities[chunk]
+        active = ones(len(_centers), dtype=bool)
+        for _ in range(max_iter):
+            within = pairwise_distances(_centers[active], points) <= bandwidth
+            masses = within @ weights
+            shifted = (within * weights) @ points / masses.clip(min=1)[:, None]
+            moved = (masses > 0) & (norm(shifted - _centers[active], axis=1) > 1e-3 * bandwidth)
+            _intensities[active] = masses
+            _centers[active] = where(masses[:, None] > 0, shifted, _centers[active])
+            active[active] = moved
+            if not active.any():
+                break
+
+    converged = intensities > 0
+    if not converged.any():
+        raise ValueError(f'No point was within bandwidth={bandwidth} of any seed.')
+    centers, intensities = centers[converged], intensities[converged]
+    centers = centers[argsort(-intensities, kind='stable')]
+
+    # the distances from each kept center are computed as needed, since there can be too many centers for a full distance matrix
+    distinct = ones(len(centers), dtype=bool)
+    for i in range(len(centers)):
+        if distinct[i]:
+            distinct[pairwise_distances(centers[i:i + 1], centers)[0] <= bandwidth] = False
+            distinct[i] = True
+    centers = centers[distinct]
+    return centers, pairwise_distances_argmin(points, centers)
 
 class Species():
     """
@@ -13,48 +66,205 @@ class Species():
     The clustering algorithm used is "mean shift" which automatically determines the number of clusters
     and can use the previous clusters as the initial `seeds` to search for the next set of clusters.
 
-    The `BANDWIDTH` constant is used to determine how large of a space to consider for a cluster.
+    The `bandwidth` (by default, the `BANDWIDTH` constant) is used to determine how large of a space to consider for a cluster.
     If there are too many clusters, increase the bandwidth and vice-versa.
     This parameter is sensitive to the number of traits and the gene size.
 
-    `self.seeds` is a list of the centers of the current clusters, where the `i`th seed .
-    `self.labels` is a list of integers where the `i`th organism belongs to the cluster `self.labels[i]` centered at `self.seeds[i]`.
-    `self.labels_colors` is a dictionary from `self.labels` to that cluster's color.
+    Mean shift is only refit when the population has changed enough to need it.
+    Between fits, newborns are assigned to the species with the nearest seed
+    and the centroid of each species is kept up to date as organisms are born and die.
+    A full refit happens when the centroids have drifted on average (weighted by species size) more than `drift_threshold`
+    from where they were after the last fit,
+    or when more than `unassigned_threshold` of the population was born farther than the bandwidth from every seed.
+
+    The clusters are updated every `every` calls to `cluster`.
+    If `executor` is a `concurrent.futures.Executor`, the update runs on it in the background
+    while the simulation continues, and the result is swapped in by the first call to `cluster` after it finishes.
+    In the meantime, newborns keep the label they were given at birth, which is normally their parent's.
+
+    Labels are persistent species identifiers which are never reused, even after a species goes extinct.
+    The label of each organism is stored in the `label` column of its `Population`, where `-1` means unlabelled.
+    `self.seeds` is an array of the centers of every cluster, where the `i`th seed is the center of the species labelled `i`.
+    `self.counts` is an array of the number of organisms in each species.
+    `self.labels_colors` is a dictionary from labels to that cluster's color, which are drawn from `rng`.
     """
-    def __init__(self, organisms):
+    def __init__(
+        self,
+        population,
+        drift_threshold=DRIFT_THRESHOLD,
+        unassigned_threshold=UNASSIGNED_THRESHOLD,
+        every=CLUSTER_EVERY,
+        executor=None,
+        bandwidth=BANDWIDTH,
+        rng=None
+    ):
+        """
+        Fit the initial clusters of the organisms in `population` and label them.
+        """
         self.seeds = None
         self.labels_colors = {}
-        self.cluster(organisms)
+        self.initial_bandwidth = bandwidth
+        self.rng = rng
+        self.drift_threshold = drift_threshold
+        self.unassigned_threshold = unassigned_threshold
+        self.every = every
+        self.executor = executor
+        self.job = None
+        self.job_ids = None
+        self.calls = 0
+        n = len(population)
+        self.born = population.birth_frame[:n].max(initial=0)
+        population.label[:n] = self.fit(population.genotype[:n])
+
+    def __getstate__(self):
+        """
+        Executors and pending results cannot be copied, so a copy clusters synchronously.
+        """
+        return {**self.__dict__, 'executor': None, 'job': None, 'job_ids': None}
 
-    def cluster(self, organisms):
+    def cluster(self, population):
+        """
+        Update the clusters to account for organisms that have been born or have died since the last update.
+
+        This is done every `self.every` calls, either immediately with `step` or in the background on `self.executor`.
+        If there is already an update running in the background, no new update is started.
+        Organisms born after the previous update are treated as newborns, regardless of their current label.
+        """
+        if self.job is not None and self.job.done():
+            self.swap(population, *self.job.result())
+        self.calls += 1
+        if self.calls % self.every:
+            return
+
+        n = len(population)
+        birth_frame, born = population.birth_frame[:n], self.born
+        self.born = birth_frame.max(initial=born)
+        labels = population.label[:n].copy()
+        labels[birth_frame > born] = -1
+        if self.executor is None:
+            population.label[:n] = self.step(population.genotype[:n], labels)[1]
+        elif self.job is None:
+            species = copy(self)
+            species.labels_colors = self.labels_colors.copy()
+            self.job = self.executor.submit(species.step, population.genotype[:n].copy(), labels)
+            self.job_ids = population.id[:n].copy()
+
+    def swap(self, population, species, labels):
+        """
+        Replace the clusters with those of `species`, the result of a background update of the organisms with the ids `self.job_ids`,
+        and relabel those of them that are still in `population`.
+        Organisms born since the update started keep their current labels.
         """
-        Use `self.seeds` to specify the initial centers of clusters and determine a new set of clusters.
+        slots = population.find(self.job_ids)
+        found = slots != -1
+        population.label[slots[found]] = labels[found]
+        self.__dict__ = {**species.__dict__, 'executor': self.executor, 'job': None, 'job_ids': None,
+                         'calls': self.calls, 'every': self.every, 'born': self.born}
+
+    def step(self, genotypes, labels):
+        """
+        Update the clusters given the `genotypes` of the current organisms and their current `labels`, where newborns are labelled `-1`.
+        Return `self` and the new label of each organism.
+
+        Organisms that were already labelled keep their label, and newborns are labelled with the nearest seed of a living species,
+        so that an extinct species is never brought back.
+        The centroids are then updated and, if the thresholds are exceeded, the clusters are refit with `fit`.
+        """
+        newborns = labels == -1
+        if newborns.any():
+            living = self.counts.nonzero()[0]
+            if not len(living):  # every species is extinct, so there is no living seed to choose from
+                living = arange(len(self.seeds))
+            nearest, distances = pairwise_distances_argmin_min(genotypes[newborns], self.seeds[living])
+            labels[newborns] = living[nearest]
+            self.unassigned += count_nonzero(distances > self.bandwidth)
+
+        self.update_centroids(genotypes, labels)
+        drift = self.counts @ norm(self.centroids - self.fitted_centroids, axis=1) / len(labels)
+        if drift > self.drift_threshold or self.unassigned > self.unassigned_threshold * len(labels):
+            labels = self.fit(genotypes)
+        return self, labels
+
+    def fit(self, genotypes):
+        """
+        Use the seeds of the living species to specify the initial centers of clusters and determine a new set of clusters.
+        Return the label of each organism.
+
+        Since genes take few distinct values, many organisms share a genotype.
+        The clustering runs on the distinct genotypes weighted by how many organisms have them,
+        and each organism then takes the label of its genotype.
+        On the first call, every distinct genotype is used as a seed.
 
         The first time calling this method will generate a color for each cluster such that each color is as distinct as possible.
-        Otherwise, the previous colors will be reused. If there are more clusters than previously,
-        new colors will be associated with those clusters.
+        Otherwise, each new cluster takes the label and color of the nearest unmatched living species within the bandwidth.
+        The remaining clusters are new species and are given new labels and colors.
         """
-        bandwidth = BANDWIDTH
+        points, inverse, weights = unique(genotypes, axis=0, return_inverse=True, return_counts=True)
+        seeds = points if self.seeds is None else self.seeds[self.counts > 0]
+        bandwidth = self.initial_bandwidth
         while True:
             try:
-                mean_shift = MeanShift(seeds = self.seeds, bandwidth = bandwidth).fit(array(
-                    [[organism.genome.genotype[key] for key in organism.genome.genotype] for organism in organisms]))
+                centers, points_labels = mean_shift(points, weights, seeds, bandwidth)
                 break
-            except:
+            except ValueError:
                 bandwidth += 5
-
-        self.labels, seeds = mean_shift.labels_, mean_shift.cluster_centers_
-        self.organisms_labels = {organism: label for organism, label in zip(organisms, self.labels)}
+        self.bandwidth = bandwidth
 
         if self.labels_colors:
-            if len(self.seeds) < len(seeds):
-                self.labels_colors = {j: self.labels_colors[i] for i, j in enumerate(pairwise_distances_argmin(self.seeds, seeds))}
-                seeds = [seed for seed in range(len(seeds)) if seed not in self.labels_colors]
-                for seed, color in zip(seeds, get_colors(len(seeds)), self.labels_colors.values()):
-                    self.labels_colors[seed] = color
-            else:
-                self.labels_colors = {i: self.labels_colors[j] for i, j in enumerate(pairwise_distances_argmin(seeds, self.seeds))}
+            centers_labels = self.match(centers)
         else:
-            self.labels_colors = {seed: color for seed, color in enumerate(get_colors(len(seeds)))}
+            self.seeds = centers
+            centers_labels = arange(len(centers))
+            self.labels_colors = {seed: color for seed, color in enumerate(get_colors(len(centers), rng=self.rng))}
 
-        self.seeds = seeds
+        labels = centers_labels[points_labels][inverse.reshape(-1)]
+        self.update_centroids(genotypes, labels)
+        self.fitted_centroids = self.centroids.copy()
+        self.unassigned = 0
+        return labels
+
+    def match(self, centers):
+        """
+        Return an array of the label of each of the `centers` and update `self.seeds` and `self.labels_colors`.
+
+        Pairs of centers and living seeds are matched in order of increasing distance.
+        """
+        living = self.counts.nonzero()[0]
+        centers_labels = full(len(centers), -1)
+        if len(living):
+            distances = pairwise_distances(centers, self.seeds[living])
+            matched = set()
+            for i, j in zip(*unravel_index(argsort(distances, axis=None), distances.shape)):
+                if distances[i, j] > self.bandwidth:
+                    break
+                if centers_labels[i] == -1 and j not in matched:
+                    centers_labels[i] = living[j]
+                    matched.add(j)
+
+        new = centers_labels == -1
+        centers_labels[new] = arange(len(self.seeds), len(self.seeds) + count_nonzero(new))
+        self.seeds = vstack((self.seeds, centers[new]))
+        self.seeds[centers_labels] = centers
+
+        colors = get_colors(count_nonzero(new), exclude_colors=[WHITE, BLACK, *self.labels_colors.values()], rng=self.rng)
+        for label, color in zip(centers_labels[new], colors):
+            self.labels_colors[label] = color
+        return centers_labels
+
+    def update_centroids(self, genotypes, labels):
+        """
+        Recount the members of each species and set `self.centroids` to the mean genotype of each species.
+        The centroid of an extinct species is its seed.
+        """
+        n = len(self.seeds)
+        self.counts = bincount(labels, minlength=n)
+        self.centroids = self.seeds.copy()
+        living = self.counts > 0
+        for trait in range(genotypes.shape[1]):
+            self.centroids[living, trait] = bincount(labels, weights=genotypes[:, trait], minlength=n)[living] / self.counts[living]
+
+    def living(self):
+        """
+        Return a dictionary from the label of each species with at least one member to its seed.
+        """
+        return {label: self.seeds[label] for label in self.counts.nonzero()[0]}
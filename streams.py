@@ -0,0 +1,24 @@
+from random import Random
+from numpy.random import SeedSequence, default_rng
+
+STREAMS = ('spawning', 'mutation', 'defense', 'species')  # `random.Random`s for few, sequential draws
+BATCHED_STREAMS = ('wandering', 'death')  # NumPy `Generator`s for draws batched over the population
+
+
+class Streams():
+    """
+    Independent random number generators for each source of randomness in a `World`, all derived from one `seed`.
+
+    Each stream is seeded from its own child of a `numpy.random.SeedSequence`,
+    so drawing more or fewer numbers from one stream does not change the numbers drawn from the others.
+    A world never draws from the global `random` module,
+    so worlds run in separate threads or processes are deterministic and independent of each other.
+
+    The streams in `STREAMS` are `random.Random`s and the streams in `BATCHED_STREAMS` are NumPy `Generator`s.
+    """
+    def __init__(self, seed):
+        children = SeedSequence(seed).spawn(len(STREAMS) + len(BATCHED_STREAMS))
+        for name, child in zip(STREAMS, children):
+            setattr(self, name, Random(int.from_bytes(child.generate_state(4).tobytes(), 'little')))
+        for name, child in zip(BATCHED_STREAMS, children[len(STREAMS):]):
+            setattr(self, name, default_rng(child))
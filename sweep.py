@@ -0,0 +1,99 @@
+import argparse
+import csv
+import time
+from ast import literal_eval
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import fields
+from itertools import product
+from main import Config
+from headless import run
+
+PARAMETERS = {field.name for field in fields(Config)}
+
+
+def check(name):
+    """
+    Raise a `ValueError` if `name` is not a field of `Config`.
+    """
+    if name not in PARAMETERS:
+        raise ValueError(f'Unknown parameter `{name}`.')
+
+
+def configurations(grid, seeds=(0,)):
+    """
+    Return a list of every configuration in `grid`, a dictionary from `Config` field names to lists of values,
+    where each configuration is a dictionary from field names to values, and is run once with each of the `seeds`.
+    """
+    for name in grid:
+        check(name)
+    names = list(grid)
+    return [{**dict(zip(names, values)), 'seed': seed} for values in product(*grid.values()) for seed in seeds]
+
+
+def simulate(configuration, n_organisms, n_species, frames):
+    """
+    Run a `World` with the parameters of `configuration` and return the configuration and a dictionary summarizing the run.
+    """
+    config = Config(**{name: value for name, value in configuration.items() if name != 'seed'})
+    rows, elapsed = run(n_organisms, n_species, configuration['seed'], frames, config=config)
+    return configuration, {**rows[-1], 'seconds': elapsed, 'fps': rows[-1]['frame'] / elapsed if elapsed else 0.0}
+
+
+def sweep(grid, seeds=(0,), n_organisms=200, n_species=10, frames=100, max_workers=None):
+    """
+    Run every configuration in `grid` with each of the `seeds` across a pool of `max_workers` processes.
+    Yield a tuple of each configuration and its summary from `simulate` as soon as that run finishes,
+    so the results are not in the order of the configurations.
+
+    By default, there is one process per CPU.
+    """
+    with ProcessPoolExecutor(max_workers) as executor:
+        futures = [executor.submit(simulate, configuration, n_organisms, n_species, frames)
+                   for configuration in configurations(grid, seeds)]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def parameter(argument):
+    """
+    Parse a command line argument of the form `name=value,value,...` into the name and list of values.
+    """
+    name, _, values = argument.partition('=')
+    check(name)
+    return name, [literal_eval(value) for value in values.split(',')]
+
+
+def cli(argv=None):
+    parser = argparse.ArgumentParser(description='Run a grid of simulation parameters across a process pool.')
+    parser.add_argument('-p', '--parameter', type=parameter, action='append', default=[],
+                        help='a config field and the values to sweep, such as mutation_rate=10,50,90')
+    parser.add_argument('--seeds', type=int, default=1, help='number of seeds to run each configuration with')
+    parser.add_argument('-n', '--organisms', type=int, default=200, help='number of organisms in the initial world')
+    parser.add_argument('-s', '--species', type=int, default=10, help='number of species in the initial world')
+    parser.add_argument('-f', '--frames', type=int, default=100, help='number of frames to simulate')
+    parser.add_argument('-w', '--workers', type=int, help='number of worker processes, by default one per CPU')
+    parser.add_argument('-o', '--output', help='path of a CSV file to append the result of each run to as it finishes')
+    args = parser.parse_args(argv)
+
+    grid = dict(args.parameter)
+    start = time.perf_counter()
+    writer = f = None
+    try:
+        for configuration, summary in sweep(grid, range(args.seeds), args.organisms, args.species, args.frames, args.workers):
+            row = {**configuration, **summary}
+            print(', '.join(f'{key}={value:.2f}' if isinstance(value, float) else f'{key}={value}' for key, value in row.items()), flush=True)
+            if args.output:
+                if writer is None:
+                    f = open(args.output, 'w', newline='')
+                    writer = csv.DictWriter(f, fieldnames=row.keys())
+                    writer.writeheader()
+                writer.writerow(row)
+                f.flush()
+    finally:
+        if f is not None:
+            f.close()
+    print(f'Finished in {time.perf_counter() - start:.2f} seconds')
+
+
+if __name__ == '__main__':
+    cli()
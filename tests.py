@@ -1,6 +1,28 @@
 
+import contextlib
+import copy
+import io
+import os
+import random
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
 import unittest
+from numpy import arange, load
 from main import *
+from species import mean_shift
+from streams import Streams
+from headless import run
+import headless
+from metrics import Metrics, FIELDS
+import checkpoint
+import events
+import snapshot
+import sweep
+import benchmarks
+from profiler import Profiler
+import raster
+from worker import Worker, Frame
 
 X, Y = 1, 2
 N_ORGANISMS = 100
@@ -47,11 +69,246 @@ class TestWorld(unittest.TestCase):
         self.assertNotEqual(organism, self.world.cell_content(X, Y))
         self.world.insert_to_cell(organism)
 
+    def test_reachable_cells(self):
+        for x, y in ((0, 0), (X, Y), (GRID_WIDTH - 1, GRID_HEIGHT // 2), (GRID_WIDTH // 2, GRID_HEIGHT // 2)):
+            _organism = Organism(x, y, STARTING_ENERGY_RATE, GENERATION, 1)
+            for n in (0, 1, 2, VISIBLE_RANGE):
+                cells = [[_x, _y] for _x in range(max(x - n, 0), min(1 + x + n, GRID_WIDTH))
+                         for _y in range(max(y - n + abs(x - _x), 0), min(y + n + 1 - abs(x - _x), GRID_HEIGHT))]
+                self.assertEqual(self.world.reachable_cells(_organism, n).tolist(), cells)
+                empty_cells = [[_x, _y] for _x, _y in cells if not self.world.cell_content(_x, _y)]
+                self.assertEqual(self.world.empty_cells(_organism, n).tolist(), empty_cells)
+
+    def test_occupied_cells(self):
+        for _organism in self.world.organisms[:10] + [Organism(0, 0, STARTING_ENERGY_RATE, GENERATION, 1)]:
+            for n in (0, 1, VISIBLE_RANGE):
+                cells = [[x, y] for x, y in self.world.reachable_cells(_organism, n).tolist() if self.world.cell_content(x, y)]
+                self.assertEqual(self.world.occupied_cells(_organism, n).tolist(), cells)
+
+    def test_relationships(self):
+        population = self.world.population
+        slots = arange(len(population))
+        for _organism in self.world.organisms[:10]:
+            values = self.world.relationships(_organism, slots)
+            self.assertEqual(values.tolist(), [_organism.meet(other).value for other in self.world.organisms])
+
+    def test_grid_consistency(self):
+        world = World(N_ORGANISMS, N_SPECIES)
+        for _ in range(8):
+            world.update()
+            self.assertEqual(world.occupancy.sum(), len(world.organisms))
+            for _organism in world.organisms:
+                x, y = _organism.get_location()
+                self.assertIs(world.cell_content(x, y), _organism)
+                self.assertEqual(world.slots[y, x], _organism.slot)
+
     def test_update(self):
         frame = self.world.frame
         self.world.update()
         self.assertEqual(self.world.frame, frame + 1)
 
+    def test_update_kills(self):
+        world = World(N_ORGANISMS, N_SPECIES)
+        starving, old = world.organisms[:2]
+        starving.energy_level = -100
+        old.birth_frame = -1000
+        world.update()
+        for _organism in (starving, old):
+            self.assertFalse(_organism.alive)
+            self.assertNotIn(_organism, world.organisms)
+            self.assertIsNot(world.cell_content(*_organism.get_location()), _organism)
+        self.assertTrue(all(_organism.alive for _organism in world.organisms))
+
+    def test_reproducible(self):
+        def run(seed):
+            world = World(N_ORGANISMS, N_SPECIES, seed=seed)
+            for _ in range(8):
+                world.update()
+            population = world.population
+            return population.energy_level[:len(population)].tolist(), population.genotype[:len(population)].tolist()
+        first = run(1)
+        random.seed(2)
+        self.assertEqual(first, run(1))
+        self.assertNotEqual(first, run(2))
+
+    def test_reproducible_in_threads(self):
+        def run(seed):
+            world = World(N_ORGANISMS, N_SPECIES, seed=seed)
+            for _ in range(8):
+                world.update()
+            population = world.population
+            return population.genotype[:len(population)].tolist()
+        with ThreadPoolExecutor(4) as executor:
+            self.assertEqual(list(executor.map(run, [1, 2] * 4)), [run(1), run(2)] * 4)
+
+    def test_streams_are_independent(self):
+        streams, _streams = Streams(1), Streams(1)
+        streams.defense.random()
+        self.assertEqual(streams.mutation.random(), _streams.mutation.random())
+        self.assertEqual(streams.wandering.random(), _streams.wandering.random())
+        self.assertNotEqual(streams.mutation.random(), streams.defense.random())
+
+    def test_ids(self):
+        world = World(N_ORGANISMS, N_SPECIES)
+        for _ in range(8):
+            world.update()
+        ids = [_organism.id for _organism in world.organisms]
+        self.assertEqual(ids, sorted(set(ids)))
+        self.assertLess(ids[-1], world.next_id)
+        for _organism in world.organisms[::7]:
+            self.assertIs(world.organism(_organism.id), _organism)
+            self.assertEqual(repr(_organism), str(_organism.id))
+        dead = sorted(set(range(world.next_id)) - set(ids))
+        self.assertIsNone(world.organism(dead[0]))
+        self.assertIsNone(world.organism(world.next_id))
+        self.assertEqual(world.population.find([ids[3], dead[0], ids[0]]).tolist(), [3, -1, 0])
+
+
+class TestConfig(unittest.TestCase):
+    def test_defaults(self):
+        self.assertEqual(DEFAULT_CONFIG, Config())
+        self.assertEqual((DEFAULT_CONFIG.grid_width, DEFAULT_CONFIG.gene_length), (GRID_WIDTH, GENE_LENGTH))
+
+    def test_worlds_side_by_side(self):
+        small, large = Config(grid_width=10, grid_height=20), Config(grid_width=80, grid_height=60, gene_length=100)
+        worlds = [World(N_ORGANISMS, N_SPECIES, config=small), World(N_ORGANISMS, N_SPECIES, config=large)]
+        for _ in range(3):
+            for world in worlds:
+                world.update()
+        for world, config in zip(worlds, (small, large)):
+            self.assertEqual((len(world.grid[0]), len(world.grid)), (config.grid_width, config.grid_height))
+            for _organism in world.organisms:
+                self.assertIs(_organism.config, config)
+                self.assertTrue(0 <= _organism.x < config.grid_width and 0 <= _organism.y < config.grid_height)
+                self.assertTrue(all(1 <= value <= config.gene_length for value in _organism.get_genotype_values()))
+
+    def test_gene_length(self):
+        config = Config(gene_length=100)
+        _organism = Organism(X, Y, STARTING_ENERGY_RATE, GENERATION, 1, genotype={Size: 100}, config=config)
+        self.assertEqual(_organism.genome.phenotype[Size], Size.FOUR)
+        _organism.genome.phenotype[Size] = Size.TWO
+        _organism.genome.set_genotype(Size)
+        self.assertEqual(_organism.genome.genotype[Size], 50)
+
+
+class TestPopulation(unittest.TestCase):
+    def setUp(self):
+        self.population = Population(len(TRAITS), capacity=1)
+        self.organisms = [Organism(x, 0, STARTING_ENERGY_RATE, GENERATION, 1, population=self.population) for x in range(5)]
+
+    def test_rows(self):
+        self.assertEqual(len(self.population), 5)
+        self.assertGreaterEqual(self.population.capacity, 5)
+        for slot, organism in enumerate(self.organisms):
+            self.assertEqual(organism.slot, slot)
+            self.assertEqual(self.population.x[slot], organism.x)
+            self.assertEqual(list(self.population.genotype[slot]), organism.get_genotype_values())
+
+    def test_view(self):
+        organism = self.organisms[2]
+        organism.energy_level = 7.5
+        organism.genome.phenotype[Size] = Size.THREE
+        self.assertEqual(self.population.energy_level[2], 7.5)
+        self.assertEqual(organism.size(), 3)
+
+    def test_compact(self):
+        dead = self.organisms[1]
+        dead.alive = False
+        self.population.compact()
+        self.assertEqual(self.population.organisms, [self.organisms[i] for i in (0, 2, 3, 4)])
+        self.assertEqual([organism.x for organism in self.population.organisms], [0, 2, 3, 4])
+        self.assertEqual([organism.slot for organism in self.population.organisms], [0, 1, 2, 3])
+        self.assertIsNot(dead.population, self.population)
+        self.assertEqual(dead.x, 1)
+        self.assertFalse(dead.alive)
+
+class TestSpecies(unittest.TestCase):
+    def setUp(self):
+        self.population = Population(len(TRAITS))
+        genotypes = [[5, 5, 5, 5, 5, 5], [45, 45, 45, 45, 45, 45]]
+        self.organisms = [self.spawn(genotypes[i % 2]) for i in range(20)]
+        self.species = Species(self.population)
+
+    def spawn(self, genotype, birthday=GENERATION):
+        return Organism(0, 0, STARTING_ENERGY_RATE, GENERATION, birthday, genotype=dict(zip(TRAITS, genotype)), population=self.population)
+
+    def labels(self):
+        return [_organism.label for _organism in self.organisms]
+
+    def test_fit(self):
+        self.assertEqual(len(self.species.living()), 2)
+        self.assertNotEqual(self.organisms[0].label, self.organisms[1].label)
+        self.assertEqual(self.organisms[0].label, self.organisms[2].label)
+
+    def test_newborn_takes_nearest_seed(self):
+        labels = self.labels()
+        newborn = self.spawn([6, 5, 4, 5, 6, 5], GENERATION + 1)
+        newborn.label = self.organisms[1].label
+        self.species.cluster(self.population)
+        self.assertEqual(newborn.label, self.organisms[0].label)
+        self.assertEqual(self.labels(), labels)
+
+    def test_newborn_skips_extinct_seed(self):
+        extinct, living = self.organisms[0].label, self.organisms[1].label
+        self.species.unassigned_threshold = 1
+        for _organism in self.organisms[::2]:
+            _organism.alive = False
+        self.population.compact()
+        self.species.cluster(self.population)
+        self.assertNotIn(extinct, self.species.living())
+        newborn = self.spawn([6, 5, 4, 5, 6, 5], GENERATION + 1)
+        self.species.cluster(self.population)
+        self.assertEqual(newborn.label, living)
+        self.assertNotIn(extinct, self.species.living())
+
+    def test_refit_keeps_labels_and_colors(self):
+        labels, colors = self.labels(), self.species.labels_colors.copy()
+        self.species.drift_threshold = -1
+        self.organisms[0].alive = False
+        self.population.compact()
+        self.spawn([25, 25, 25, 25, 25, 25], GENERATION + 1)
+        self.species.cluster(self.population)
+        for _organism, label in zip(self.organisms[1:], labels[1:]):
+            self.assertEqual(_organism.label, label)
+            self.assertEqual(self.species.labels_colors[label], colors[label])
+
+    def test_every(self):
+        self.species.every = 3
+        newborn = self.spawn([6, 5, 4, 5, 6, 5], GENERATION + 1)
+        newborn.label = self.organisms[1].label
+        for _ in range(2):
+            self.species.cluster(self.population)
+            self.assertEqual(newborn.label, self.organisms[1].label)
+        self.species.cluster(self.population)
+        self.assertEqual(newborn.label, self.organisms[0].label)
+
+    def test_background(self):
+        world = World(N_ORGANISMS, N_SPECIES)
+        with ThreadPoolExecutor(1) as executor:
+            world.species.executor = executor
+            for _ in range(6):
+                world.update()
+                self.assertTrue(all(_organism.label != -1 for _organism in world.organisms))
+            world.species.job.result()
+            world.update()
+        self.assertTrue(all(_organism.label in world.species.labels_colors for _organism in world.organisms))
+
+class TestMeanShift(unittest.TestCase):
+    points = [[1, 1], [2, 2], [3, 1], [40, 40], [42, 41]]
+    weights = [3, 1, 2, 4, 1]
+
+    def test_weights(self):
+        repeated = [point for point, weight in zip(self.points, self.weights) for _ in range(weight)]
+        centers, labels = mean_shift(self.points, self.weights, self.points, 10)
+        _centers, _labels = mean_shift(repeated, [1] * len(repeated), repeated, 10)
+        self.assertEqual(centers.tolist(), _centers.tolist())
+        self.assertEqual(len(centers), 2)
+        self.assertEqual(labels.tolist(), [0, 0, 0, 1, 1])
+
+    def test_no_points_in_bandwidth(self):
+        with self.assertRaises(ValueError):
+            mean_shift(self.points, self.weights, [[100, 100]], 10)
+
 class TestMeet(unittest.TestCase):
     def setUp(self):
         self.organism_1 = Organism(0, 0, STARTING_ENERGY_RATE, GENERATION, 1)
@@ -60,13 +317,14 @@ class TestMeet(unittest.TestCase):
         # Different skin options to make different 'species' by default
         self.organism_1.genome.phenotype[Skin] = Skin.FUR
         self.organism_2.genome.phenotype[Skin] = Skin.SHELL
+        self.organism_1.label, self.organism_2.label = 1, 2
 
     def test_herbivore_eats_smaller_plant(self):
         self.organism_1.genome.phenotype[EnergySource] = EnergySource.HERBIVORE
         self.organism_1.genome.phenotype[Size] = Size.TWO
         self.organism_2.genome.phenotype[EnergySource] = EnergySource.PHOTOSYNTHESIS
         self.organism_2.genome.phenotype[Size] = Size.ONE
-        relationship = self.organism_1.meet(self.organism_2, {self.organism_1: 1, self.organism_2: 2})
+        relationship = self.organism_1.meet(self.organism_2)
         self.assertEqual(relationship, Relationships.PREY)
 
     def test_smaller_plant_eaten_by_herbivore(self):
@@ -74,7 +332,7 @@ class TestMeet(unittest.TestCase):
         self.organism_2.genome.phenotype[EnergySource] = EnergySource.HERBIVORE
         self.organism_1.genome.phenotype[Size] = Size.ONE
         self.organism_2.genome.phenotype[Size] = Size.TWO
-        relationship = self.organism_1.meet(self.organism_2, {self.organism_1: 1, self.organism_2: 2})
+        relationship = self.organism_1.meet(self.organism_2)
         self.assertEqual(relationship, Relationships.PREDATOR)
 
     def test_herbivore_cannot_eat_larger_plant(self):
@@ -82,7 +340,7 @@ class TestMeet(unittest.TestCase):
         self.organism_2.genome.phenotype[EnergySource] = EnergySource.PHOTOSYNTHESIS
         self.organism_1.genome.phenotype[Size] = Size.ONE
         self.organism_2.genome.phenotype[Size] = Size.TWO
-        relationship = self.organism_1.meet(self.organism_2, {self.organism_1: 1, self.organism_2: 2})
+        relationship = self.organism_1.meet(self.organism_2)
         self.assertEqual(relationship, Relationships.NEUTRAL)
 
     def test_omnivore_eats_smaller_carnivore(self):
@@ -90,7 +348,7 @@ class TestMeet(unittest.TestCase):
         self.organism_2.genome.phenotype[EnergySource] = EnergySource.CARNIVORE
         self.organism_1.genome.phenotype[Size] = Size.TWO
         self.organism_2.genome.phenotype[Size] = Size.ONE
-        relationship = self.organism_1.meet(self.organism_2, {self.organism_1: 1, self.organism_2: 2})
+        relationship = self.organism_1.meet(self.organism_2)
         self.assertEqual(relationship, Relationships.PREY)
 
     def test_equal_omnivore_carnivore_do_not_eat(self):
@@ -98,7 +356,7 @@ class TestMeet(unittest.TestCase):
         self.organism_2.genome.phenotype[EnergySource] = EnergySource.CARNIVORE
         self.organism_1.genome.phenotype[Size] = Size.ONE
         self.organism_2.genome.phenotype[Size] = Size.ONE
-        relationship = self.organism_1.meet(self.organism_2, {self.organism_1: 1, self.organism_2: 2})
+        relationship = self.organism_1.meet(self.organism_2)
         self.assertEqual(relationship, Relationships.NEUTRAL)
 
     def test_larger_omnivore_eats_smaller_omnivore(self):
@@ -106,7 +364,7 @@ class TestMeet(unittest.TestCase):
         self.organism_2.genome.phenotype[EnergySource] = EnergySource.OMNIVORE
         self.organism_1.genome.phenotype[Size] = Size.TWO
         self.organism_2.genome.phenotype[Size] = Size.ONE
-        relationship = self.organism_1.meet(self.organism_2, {self.organism_1: 1, self.organism_2: 2})
+        relationship = self.organism_1.meet(self.organism_2)
         self.assertEqual(relationship, Relationships.PREY)
 
     def test_no_cannibalism(self):
@@ -114,9 +372,376 @@ class TestMeet(unittest.TestCase):
         self.organism_1.genome.phenotype = self.organism_2.genome.phenotype
         self.organism_1.genome.phenotype[Size] = Size.TWO
         self.organism_2.genome.phenotype[Size] = Size.ONE
-        relationship = self.organism_1.meet(self.organism_2, {self.organism_1: 1, self.organism_2: 1})
+        self.organism_2.label = self.organism_1.label
+        relationship = self.organism_1.meet(self.organism_2)
         self.assertEqual(relationship, Relationships.CONSPECIFIC)
 
+    def test_unlabelled_are_not_conspecific(self):
+        self.organism_1.genome.phenotype = self.organism_2.genome.phenotype
+        self.organism_1.label = self.organism_2.label = -1
+        relationship = self.organism_1.meet(self.organism_2)
+        self.assertEqual(relationship, Relationships.NEUTRAL)
+
+
+class TestHeadless(unittest.TestCase):
+    def test_run(self):
+        rows, _ = run(50, 5, seed=0, frames=5)
+        self.assertEqual([row['frame'] for row in rows], list(range(6)))
+        self.assertEqual(rows[0]['organisms'], 50)
+        for row in rows:
+            self.assertEqual(row['organisms'], sum(row[energy_source.name.lower()] for energy_source in EnergySource))
+
+    def test_reproducible(self):
+        self.assertEqual(run(50, 5, seed=1, frames=5)[0], run(50, 5, seed=1, frames=5)[0])
+
+
+class TestSnapshot(unittest.TestCase):
+    def setUp(self):
+        self.world = World(N_ORGANISMS, N_SPECIES, seed=3, terrain=[['Terrain.EARTH'] * GRID_WIDTH for _ in range(GRID_HEIGHT)])
+        for _ in range(5):
+            self.world.update()
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'test.world')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def assertContinuesEqually(self, world):
+        original = copy.deepcopy(self.world)
+        for _ in range(5):
+            original.update()
+            world.update()
+        self.assertEqual(original.frame, world.frame)
+        n = len(original.population)
+        self.assertEqual(n, len(world.population))
+        for name in ('x', 'y', 'energy_level', 'label', 'genotype'):
+            self.assertEqual(getattr(original.population, name)[:n].tolist(), getattr(world.population, name)[:n].tolist())
+
+    def test_round_trip(self):
+        for compress, mmap in ((False, False), (False, True), (True, False)):
+            snapshot.save(self.path, self.world, compress=compress)
+            world = snapshot.load(self.path, mmap=mmap)
+            self.assertEqual(world.terrain, self.world.terrain)
+            self.assertEqual(world.config, self.world.config)
+            for _organism in world.organisms:
+                self.assertIs(world.cell_content(*_organism.get_location()), _organism)
+            self.assertContinuesEqually(world)
+
+    def test_invalid(self):
+        with open(self.path, 'wb') as f:
+            f.write(b'not a world' * 10)
+        self.assertRaises(ValueError, snapshot.load, self.path)
+
+
+class TestCheckpoint(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_keep(self):
+        with checkpoint.Checkpointer(self.directory.name, every=2, keep=2) as checkpointer:
+            run(N_ORGANISMS, N_SPECIES, seed=0, frames=7, checkpointer=checkpointer)
+        names = [os.path.basename(path) for path in checkpoint.checkpoints(self.directory.name)]
+        self.assertEqual(names, ['frame-000000004.world', 'frame-000000006.world'])
+        self.assertRaises(ValueError, checkpoint.Checkpointer, self.directory.name, every=2, keep=0)
+
+    def test_resume(self):
+        rows, _ = run(N_ORGANISMS, N_SPECIES, seed=0, frames=10)
+        with checkpoint.Checkpointer(self.directory.name, every=5) as checkpointer:
+            run(N_ORGANISMS, N_SPECIES, seed=0, frames=7, checkpointer=checkpointer)
+        world = checkpoint.resume(self.directory.name)
+        self.assertEqual(world.frame, 5)
+        self.assertEqual(run(N_ORGANISMS, N_SPECIES, seed=0, frames=10, world=world)[0], rows[5:])
+
+    def test_resume_ignores_config(self):
+        arguments = ['-n', '50', '--checkpoints', self.directory.name, '--checkpoint-every', '3']
+        with contextlib.redirect_stdout(io.StringIO()):
+            headless.main([*arguments, '-f', '3', '--cluster-every', '2'])
+            for cluster_every, warned in (('2', False), ('3', True)):
+                with contextlib.redirect_stderr(io.StringIO()) as stderr:
+                    headless.main([*arguments, '-f', '3', '--resume', '--cluster-every', cluster_every])
+                self.assertEqual('Ignoring --cluster-every' in stderr.getvalue(), warned)
+        self.assertEqual(checkpoint.resume(self.directory.name).config.cluster_every, 2)
+
+    def test_resume_without_checkpoints(self):
+        self.assertIsNone(checkpoint.resume(os.path.join(self.directory.name, 'missing')))
+
+
+def simulate(*arguments, interrupted=False):
+    with tempfile.TemporaryDirectory() as directory, contextlib.redirect_stdout(io.StringIO()):
+        checkpoints = ['--checkpoints', directory, '--checkpoint-every', '3']
+        if interrupted:
+            headless.main(['-n', '50', '-f', '7', *checkpoints, *arguments])
+            headless.main(['-n', '50', '-f', '10', *checkpoints, '--resume', *arguments])
+        else:
+            headless.main(['-n', '50', '-f', '10', *arguments])
+
+
+class TestMetrics(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def record(self, extension, frames=10):
+        path = os.path.join(self.directory.name, 'metrics' + extension)
+        world = World(N_ORGANISMS, N_SPECIES)
+        with Metrics(path, buffer_size=3) as world.metrics:
+            for _ in range(frames):
+                world.update()
+        return path, world
+
+    def test_births_and_deaths(self):
+        path, world = self.record('.npy')
+        frames = load(path)
+        self.assertEqual(frames['frame'].tolist(), list(range(1, 11)))
+        self.assertEqual(frames['organisms'][-1], len(world.organisms))
+        deaths = sum(frames[f'deaths_{cause}'] for cause in DEATH_CAUSES)
+        self.assertEqual((frames['organisms'][:-1] + frames['births'][1:] - deaths[1:]).tolist(), frames['organisms'][1:].tolist())
+
+    def test_formats(self):
+        npy, _ = self.record('.npy')
+        csv, _ = self.record('.csv')
+        with open(csv) as f:
+            self.assertEqual(f.readline().strip().split(','), list(FIELDS))
+            self.assertEqual(len(f.readlines()), 10)
+        species = load(npy.replace('metrics', 'metrics-species'))
+        frames = load(npy)
+        self.assertEqual([(species['frame'] == frame).sum() for frame in range(1, 11)], frames['species'].tolist())
+        self.assertRaises(ValueError, Metrics, os.path.join(self.directory.name, 'metrics.txt'))
+
+    def test_resume(self):
+        for extension in ('.npy', '.csv'):
+            path, reference = (os.path.join(self.directory.name, name + extension) for name in ('resumed', 'reference'))
+            simulate('--metrics', path, interrupted=True)
+            simulate('--metrics', reference)
+            if extension == '.npy':
+                self.assertEqual(load(path)['frame'].tolist(), list(range(1, 11)))
+                self.assertEqual(load(path).tolist(), load(reference).tolist())
+            else:
+                with open(path) as f, open(reference) as _f:
+                    self.assertEqual(f.read(), _f.read())
+
+
+class TestEvents(unittest.TestCase):
+    def test_log(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'events.npy')
+            world = World(N_ORGANISMS, N_SPECIES)
+            births = deaths = 0
+            with events.EventLog(path, len(TRAITS), buffer_size=16) as log:
+                log.attach(world)
+                for _ in range(10):
+                    world.update()
+                    births += world.births
+                    deaths += sum(world.deaths.values())
+            _events = events.load(path, mmap=False)
+
+        born = _events[_events['event'] == events.Event.BIRTH]
+        self.assertEqual(len(born), N_ORGANISMS + births)
+        self.assertEqual(len(_events) - len(born), deaths)
+        self.assertEqual(sorted(born['id'].tolist()), list(range(world.next_id)))
+        self.assertEqual(len(born) - deaths, len(world.organisms))
+
+        parents = events.parents(_events)
+        founders = [_id for _id, _parents in parents.items() if not _parents]
+        self.assertEqual(founders, list(range(N_ORGANISMS)))
+        for child, _parents in parents.items():
+            self.assertTrue(all(parent < child for parent in _parents))
+        youngest = world.organisms[-1]
+        lineage = events.lineage(_events, youngest.id)
+        self.assertLessEqual(len(lineage), youngest.generation - 1)
+        self.assertIn(lineage[-1], founders)
+        self.assertIn(youngest.id, events.children(_events)[lineage[0]])
+
+    def test_resume(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path, reference = os.path.join(directory, 'resumed.npy'), os.path.join(directory, 'reference.npy')
+            simulate('--events', path, interrupted=True)
+            simulate('--events', reference)
+            _events, _reference = events.load(path, mmap=False), events.load(reference, mmap=False)
+        self.assertEqual(_events['frame'][-1], 10)
+        for name in _events.dtype.names:
+            self.assertEqual(_events[name].tolist(), _reference[name].tolist())
+
+
+class TestSweep(unittest.TestCase):
+    def test_configurations(self):
+        configurations = sweep.configurations({'mutation_rate': [10, 90], 'bandwidth': [20]}, seeds=range(2))
+        self.assertEqual(len(configurations), 4)
+        self.assertIn({'mutation_rate': 90, 'bandwidth': 20, 'seed': 1}, configurations)
+        self.assertRaises(ValueError, sweep.configurations, {'MUTATION_RATE': [1]})
+
+    def test_sweep(self):
+        results = list(sweep.sweep({'photosynthesis_rate': [0.5, 2]}, seeds=range(2), n_organisms=20, n_species=2, frames=2, max_workers=2))
+        self.assertEqual(len(results), 4)
+        for configuration, summary in results:
+            self.assertEqual(summary['organisms'], sweep.simulate(configuration, 20, 2, 2)[1]['organisms'])
+
+
+class TestBenchmarks(unittest.TestCase):
+    def test_run(self):
+        results = benchmarks.run(['1k'], ['dense'], frames=1, render=False, quiet=True)
+        world, species, _raster = results['benchmarks']
+        self.assertEqual(world['phases']['aging']['calls'], 1)
+        self.assertEqual(world['phases']['clustering']['calls'], 1)
+        self.assertEqual(species['organisms'], world['final_organisms'])
+
+        baseline = copy.deepcopy(results)
+        self.assertEqual(benchmarks.regressions(results, baseline, 0.25), [])
+        world['frame_seconds'] = 2 * baseline['benchmarks'][0]['frame_seconds']
+        world['phases']['compaction']['frame_seconds'] *= 2
+        slower = benchmarks.regressions(results, baseline, 0.25)
+        self.assertEqual([name for name, *_ in slower], ['world/1k-dense/frame_seconds', 'world/1k-dense/compaction'])
+        self.assertEqual(benchmarks.failures(slower), [])
+        world['median_frame_seconds'] = 2 * baseline['benchmarks'][0]['median_frame_seconds']
+        slower = benchmarks.regressions(results, baseline, 0.25)
+        self.assertEqual([name for name, *_ in benchmarks.failures(slower)], ['world/1k-dense/median_frame_seconds'])
+
+    @unittest.skipUnless(os.environ.get('DISPLAY'), 'rendering requires a display')
+    def test_render(self):
+        result = benchmarks.benchmark_render(frames=2)
+        if 'skipped' in result:  # such as without `tkinter`
+            self.skipTest(result['skipped'])
+        self.assertEqual(result['frames'], 2)
+        self.assertGreater(result['frame_seconds'], 0)
+
+
+class TestProfiler(unittest.TestCase):
+    def test_profile(self):
+        world, reference = World(N_ORGANISMS, N_SPECIES), World(N_ORGANISMS, N_SPECIES)
+        with Profiler(window=2) as profiler:
+            profiler.attach(world)
+            self.assertRaises(ValueError, Profiler().attach, world)
+            for _ in range(4):
+                world.update()
+                reference.update()
+            stats = profiler.stats()
+        self.assertEqual(len(profiler.frames), 2)
+        for name in ('update', 'survive', 'act', 'compact', 'cluster', 'pathfind', 'meet'):
+            self.assertIn(name, stats)
+        self.assertEqual(stats['update']['calls'], 1)
+        self.assertEqual(profiler.totals['update'][1], 4)
+        self.assertGreaterEqual(stats['update']['seconds'], stats['act']['seconds'])
+        self.assertEqual(str(world), str(reference))
+
+        self.assertNotIn('update', vars(world))
+        self.assertNotIn('meet', vars(world))
+        calls = profiler.totals['meet'][1]
+        world.update()
+        self.assertEqual(profiler.totals['meet'][1], calls)
+
+    def test_profile_worlds_separately(self):
+        worlds = [World(N_ORGANISMS, N_SPECIES, seed=seed) for seed in range(3)]
+        first, second = Profiler().attach(worlds[0]), Profiler().attach(worlds[1])
+        for _ in range(3):
+            for world in worlds:
+                world.update()
+        first.detach()
+        calls = second.totals['meet'][1]
+        for world in worlds:
+            world.update()
+        second.detach()
+        self.assertEqual(first.totals['update'][1], 3)
+        self.assertEqual(second.totals['update'][1], 4)
+        self.assertGreater(first.totals['meet'][1], 0)
+        self.assertGreater(second.totals['meet'][1], calls)
+
+
+class TestRaster(unittest.TestCase):
+    def test_glyph(self):
+        for energy_source in EnergySource:
+            small, large = raster.glyph(energy_source, 0, 8), raster.glyph(energy_source, raster.ENERGY_LEVELS, 8)
+            self.assertLess(small.sum(), large.sum())
+            self.assertTrue((large | small == large).all())
+            self.assertEqual(raster.glyph(energy_source, 0, 1).tolist(), [[True]])
+
+    def test_render(self):
+        world = World(N_ORGANISMS, N_SPECIES)
+        for _ in range(4):
+            world.update()
+        image = raster.Raster(world, 4).render()
+        self.assertEqual(image.shape, (4 * world.config.grid_height, 4 * world.config.grid_width, 3))
+        earth = raster.TERRAIN_COLORS['Terrain.EARTH']
+        for _organism in world.organisms:
+            color = [int(255 * channel) for channel in world.species.labels_colors[_organism.label]]
+            self.assertEqual(image[4 * _organism.y + 2, 4 * _organism.x + 2].tolist(), color)
+        empty = [(x, y) for x in range(world.config.grid_width) for y in range(world.config.grid_height) if world.grid[y][x] is None]
+        for x, y in empty:
+            self.assertEqual(image[4 * y + 2, 4 * x + 2].tolist(), list(earth))
+
+    def test_recorder(self):
+        world = World(N_ORGANISMS, N_SPECIES)
+        with tempfile.TemporaryDirectory() as directory:
+            run(N_ORGANISMS, N_SPECIES, 0, 4, world=world, recorder=raster.Recorder(directory, every=2))
+            self.assertEqual(sorted(os.listdir(directory)), ['frame-000000002.png', 'frame-000000004.png'])
+
+
+class TestWorker(unittest.TestCase):
+    def test_frame(self):
+        world = World(N_ORGANISMS, N_SPECIES)
+        world.update()
+        frame = Frame(world)
+        organisms = [(_organism.id, _organism.x, _organism.y, str(_organism)) for _organism in world.organisms]
+        world.update()
+        self.assertEqual(frame.frame, 1)
+        self.assertEqual([(_organism.id, _organism.x, _organism.y, str(_organism)) for _organism in frame.organisms], organisms)
+        for _id, x, y, _ in organisms:
+            self.assertEqual(frame.organism(_id).id, _id)
+            self.assertEqual(frame.cell_content(x, y).id, _id)
+        self.assertIsNone(frame.organism(world.next_id))
+
+    def test_worker(self):
+        world, reference = World(N_ORGANISMS, N_SPECIES), World(N_ORGANISMS, N_SPECIES)
+        worker = Worker(world, queue_size=2)
+        frames = []
+        worker.call(lambda _world: frames.append(_world.frame))
+        worker.start()
+        while worker.frames.qsize() < 2 or world.frame < 5:
+            time.sleep(0.001)
+        worker.stop()
+        self.assertEqual(frames, [0])
+        self.assertEqual(worker.frames.qsize(), 2)
+        latest = worker.latest()
+        self.assertEqual(latest.frame, world.frame)
+        self.assertIsNone(worker.latest())
+
+        for _ in range(world.frame):
+            reference.update()
+        self.assertEqual(str(world), str(reference))
+
+    def test_skip(self):
+        world = World(N_ORGANISMS, N_SPECIES)
+        worker = Worker(world, queue_size=100, skip=3)
+        worker.start()
+        while world.frame < 9:
+            time.sleep(0.001)
+        worker.stop()
+        frames = [worker.frames.get().frame for _ in range(worker.frames.qsize())]
+        self.assertEqual(frames, list(range(3, world.frame + 1, 3)))
+        self.assertEqual(worker.updates, world.frame)
+
+        worker = Worker(world, queue_size=100, skip=None, target_fps=1e-3)
+        worker.start()
+        while worker.updates < 3:
+            time.sleep(0.001)
+        worker.stop()
+        self.assertEqual(worker.frames.qsize(), 1)
+
+    def test_skip_rate(self):
+        rates = []
+        for skip in (1, 4):
+            worker = Worker(World(N_ORGANISMS, N_SPECIES), delay=0.1, skip=skip)
+            start = time.perf_counter()
+            worker.start()
+            time.sleep(0.5)
+            worker.stop()
+            rates.append(worker.updates / (time.perf_counter() - start))
+        self.assertGreater(rates[1], 2 * rates[0])
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,162 @@
+import queue
+import threading
+import time
+from numpy import array
+from main import Organism
+from population import Population, COLUMNS
+
+QUEUE_SIZE = 2  # number of frames that may wait to be drawn before the oldest is dropped
+TARGET_FPS = 30  # number of frames published per second when frames are skipped adaptively
+
+
+class Frame():
+    """
+    A copy of the state of a `World` at the end of a frame, which is not changed by later updates of the world.
+
+    A frame has the parts of the world that the GUI reads, so it can be drawn and inspected while the world is being updated on another thread:
+    the `population` and `slots` of the organisms, the `labels_colors` and `living` species, and the state of the sun.
+    Organisms are only viewed when needed, such as by `organism` and `cell_content`, since viewing every organism of a large world is slow.
+    """
+    def __init__(self, world, profile=None):
+        population = world.population
+        n = len(population)
+        self.population = Population.from_arrays({name: array(getattr(population, name)[:n]) for name in (*COLUMNS, 'genotype', 'phenotype')})
+        self.population.organisms = [None] * n  # placeholders that give the population its length, see `organisms`
+        self.slots = world.slots.copy()
+        self.config, self.terrain = world.config, world.terrain
+        self.frame = world.frame
+        self.is_day = world.sun.is_day
+        self.days = world.sun.day_night_cycles // (2 * world.sun.day_length)
+        self.labels_colors = dict(world.species.labels_colors)
+        self.living = {label: array(seed) for label, seed in world.species.living().items()}
+        self.profile = profile  # the summary of the `Profiler` of the world, if it is being profiled
+
+    @property
+    def organisms(self):
+        """
+        A list of a view of every organism in `self.population`, where the `i`th organism occupies slot `i`.
+        """
+        return [Organism.view(self.population, slot, self.config) for slot in range(len(self.population))]
+
+    def organism(self, _id):
+        """
+        Return a view of the organism with the id `_id`, or `None` if there is none.
+        """
+        slot = int(self.population.find(_id))
+        return None if slot == -1 else Organism.view(self.population, slot, self.config)
+
+    def cell_content(self, x, y):
+        """
+        Return a view of the organism in the cell at `x` and `y`, or `None` if it is empty.
+        """
+        slot = int(self.slots[y, x])
+        return None if slot == -1 else Organism.view(self.population, slot, self.config)
+
+    @property
+    def generation(self):
+        """
+        The highest generation of the organisms in the frame.
+        """
+        return int(self.population.generation[:len(self.population)].max(initial=0))
+
+
+class Worker():
+    """
+    Update a `World` on a background thread, publishing a `Frame` after each update that is not skipped.
+
+    Frames are published to a queue of at most `queue_size` frames. When it is full, the oldest frame is dropped,
+    so the simulation never waits for drawing, and `latest` returns the newest frame and discards the rest.
+    The world is only accessed by the worker thread while it is running, so other threads change it with `call`,
+    which runs a function on the worker thread between updates.
+    After publishing a frame, the worker waits until at least `delay` seconds have passed since it began simulating the frames up to it,
+    so `delay` is the time between drawn frames however many frames are skipped, and it does not update while `paused`.
+
+    If `skip` is an integer, a frame is only published when the frame of the world is a multiple of it,
+    so that `skip` frames are simulated for each frame that is drawn.
+    If `skip` is `None`, frames are skipped adaptively: a frame is published when at least `1 / target_fps` seconds
+    have passed since the previous one, so as many frames are simulated between them as the simulation can.
+    The `updates` is the number of updates so far, which is used to measure the simulation rate.
+    """
+    def __init__(self, world, delay=0.0, queue_size=QUEUE_SIZE, skip=1, target_fps=TARGET_FPS):
+        self.world = world
+        self.delay = delay
+        self.skip = skip
+        self.target_fps = target_fps
+        self.updates = 0
+        self.published = -float('inf')  # the time that the latest frame was published
+        self.paused = False
+        self.profiler = None
+        self.frames = queue.Queue(queue_size)
+        self.calls = queue.SimpleQueue()
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.loop, daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def call(self, function):
+        """
+        Call `function` with the world on the worker thread before the next update.
+        """
+        self.calls.put(function)
+
+    def publish(self, frame):
+        """
+        Add `frame` to the queue, dropping the oldest frame if it is full.
+        """
+        while True:
+            try:
+                self.frames.put_nowait(frame)
+                return
+            except queue.Full:
+                try:
+                    self.frames.get_nowait()
+                except queue.Empty:
+                    pass
+
+    def latest(self):
+        """
+        Return the newest published frame and discard the older ones, or `None` if none were published since the last call.
+        """
+        frame = None
+        while True:
+            try:
+                frame = self.frames.get_nowait()
+            except queue.Empty:
+                return frame
+
+    def skipped(self, now):
+        """
+        Return whether the current frame of the world is skipped rather than published at the time `now`.
+        """
+        if self.skip is None:
+            return now - self.published < 1 / self.target_fps
+        return self.world.frame % self.skip != 0
+
+    def loop(self):
+        start = time.perf_counter()  # the time that simulating the frames up to the next published frame began
+        while not self.stopped.is_set():
+            while not self.calls.empty():
+                self.calls.get()(self.world)
+            if self.paused:
+                self.stopped.wait(0.01)
+                start = time.perf_counter()
+                continue
+            self.world.update()
+            self.updates += 1
+            now = time.perf_counter()
+            if self.skipped(now):
+                continue
+            self.published = now
+            self.publish(Frame(self.world, None if self.profiler is None else self.profiler.summary()))
+            remaining = self.delay - (now - start)
+            if remaining > 0:
+                self.stopped.wait(remaining)
+            start = time.perf_counter()
+
+    def stop(self):
+        """
+        Stop updating the world and wait for the current update to finish.
+        """
+        self.stopped.set()
+        self.thread.join()
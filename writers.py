@@ -0,0 +1,133 @@
+import csv
+import os
+import struct
+from numpy import count_nonzero, empty, load
+from numpy.lib.format import dtype_to_descr
+
+
+def continued(path, frame):
+    """
+    Return whether a writer of `path` continues the rows already in it, up to and including those of `frame`,
+    which is the case if `frame` is given and the file is not empty.
+    """
+    return frame is not None and os.path.exists(path) and os.path.getsize(path) > 0
+
+
+class CSVWriter():
+    """
+    Append columns to a CSV file, writing the header before the first rows.
+    If `frame` is given, such as when resuming from a checkpoint, the rows of an existing file up to `frame` are kept.
+    """
+    def __init__(self, path, frame=None):
+        rows = []
+        if continued(path, frame):
+            with open(path, newline='') as f:
+                rows = list(csv.reader(f))
+            index = rows[0].index('frame')
+            rows = rows[:1] + [row for row in rows[1:] if int(row[index]) <= frame]
+        self.f = open(path, 'w', newline='')
+        self.writer = csv.writer(self.f)
+        self.writer.writerows(rows)
+        self.header = bool(rows)
+
+    def write(self, columns):
+        if not self.header:
+            self.writer.writerow(columns)
+            self.header = True
+        self.writer.writerows(zip(*(column.tolist() for column in columns.values())))
+        self.f.flush()
+
+    def close(self):
+        self.f.close()
+
+
+class NumPyWriter():
+    """
+    Append columns to a `.npy` file of a one-dimensional structured array with a field for each column.
+
+    The header has a fixed size and is rewritten with the new length after every write,
+    so the file can be read with `numpy.load` at any time.
+    If `frame` is given, the records of an existing file up to `frame`, which must be sorted by frame, are kept.
+    """
+    HEADER_SIZE = 4096
+
+    def __init__(self, path, frame=None):
+        self.length = 0
+        self.dtype = None
+        if not continued(path, frame):
+            self.f = open(path, 'wb')
+            return
+        records = load(path, mmap_mode='r')
+        if records.offset != self.HEADER_SIZE:
+            raise ValueError(f'`{path}` was not written by a `NumPyWriter`, so it cannot be continued.')
+        self.length, self.dtype = int(count_nonzero(records['frame'] <= frame)), records.dtype
+        del records
+        self.f = open(path, 'r+b')
+        self.f.truncate(self.HEADER_SIZE + self.length * self.dtype.itemsize)
+        self.f.write(self.header(self.dtype))
+        self.f.flush()
+
+    def write(self, columns):
+        if self.dtype is None:
+            self.dtype = [(name, column.dtype) for name, column in columns.items()]
+        records = empty(len(next(iter(columns.values()))), dtype=self.dtype)
+        for name, column in columns.items():
+            records[name] = column
+        self.append(records)
+
+    def append(self, records):
+        """
+        Append a structured array of `records`, which must have the same dtype as those already written.
+        """
+        self.f.seek(self.HEADER_SIZE + self.length * records.dtype.itemsize)
+        self.f.write(records.tobytes())
+        self.length += len(records)
+        self.f.seek(0)
+        self.f.write(self.header(records.dtype))
+        self.f.flush()
+
+    def header(self, dtype):
+        """
+        Return the `.npy` format version 1.0 header of the array written so far, padded to `HEADER_SIZE` bytes.
+        """
+        magic = b'\x93NUMPY\x01\x00'
+        text = repr({'descr': dtype_to_descr(dtype), 'fortran_order': False, 'shape': (self.length,)}).encode('latin1')
+        length = self.HEADER_SIZE - len(magic) - 2
+        if len(text) >= length:
+            raise ValueError('Too many columns to fit in the `.npy` header.')
+        return magic + struct.pack('<H', length) + text.ljust(length - 1) + b'\n'
+
+    def close(self):
+        self.f.close()
+
+
+class ParquetWriter():
+    """
+    Append columns to a Parquet file as a row group, which requires the optional `pyarrow` package.
+    If `frame` is given, the rows of an existing file up to `frame` are kept, by rewriting them as the first row group.
+    """
+    def __init__(self, path, frame=None):
+        import pyarrow
+        import pyarrow.compute
+        import pyarrow.parquet
+        self.pyarrow = pyarrow
+        self.path = path
+        self.writer = None
+        if continued(path, frame):
+            table = pyarrow.parquet.read_table(path)
+            table = table.filter(pyarrow.compute.less_equal(table['frame'], frame))
+            self.writer = pyarrow.parquet.ParquetWriter(path, table.schema)
+            self.writer.write_table(table)
+
+    def write(self, columns):
+        table = self.pyarrow.table(columns)
+        if self.writer is None:
+            self.writer = self.pyarrow.parquet.ParquetWriter(self.path, table.schema)
+        self.writer.write_table(table)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+WRITERS = {'.csv': CSVWriter, '.npy': NumPyWriter, '.parquet': ParquetWriter}